@@ -0,0 +1,177 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from db.database import get_db, init_db
+from db.sync_lock import sync_lock
+from utils.api import AVAILABLE_LEAGUES
+from utils.data_sync import season_has_standings, sync_matches
+from utils.dev_mode import log_error
+from utils.multi_fetch import MAX_CONCURRENCY, fetch_many
+
+CHECKPOINT_FILE = os.path.join(".cache", "backfill_checkpoint.json")
+
+
+def load_checkpoint(path):
+    """Return the checkpoint entries keyed by 'league_id:season'"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_checkpoint(path, checkpoint):
+    """Atomically write the checkpoint so a crash never leaves it half written"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(checkpoint, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def checkpoint_key(league_id, season):
+    return f"{league_id}:{season}"
+
+
+def standings_stored(league_id, season):
+    """Check if the standings of a league and season made it into the database"""
+    db = next(get_db())
+    try:
+        return season_has_standings(db, league_id, season)
+    finally:
+        db.close()
+
+
+def backfill_pair(league_id, season, payload):
+    """
+    Write one fetched league and season into the database. Returns the
+    number of fixtures written, or None if another process holds the lock.
+    """
+    with sync_lock(league_id, season) as acquired:
+        if not acquired:
+            return None
+        return sync_matches(league_id,
+                            season,
+                            full_sync=True,
+                            fixtures_payload=payload['fixtures'],
+                            standings_df=payload['standings'])
+
+
+def backfill(leagues, seasons, concurrency=MAX_CONCURRENCY,
+             checkpoint_path=CHECKPOINT_FILE):
+    """
+    Load every league and season that is not yet in the checkpoint.
+
+    Pairs are fetched concurrently in batches of concurrency and written one
+    at a time, and each pair is checkpointed as soon as it is stored, so a
+    rerun after a crash or an exhausted API quota picks up where it stopped.
+    A pair whose standings could not be stored is left for the next run.
+    """
+    checkpoint = load_checkpoint(checkpoint_path)
+    pending = [(league_id, season) for league_id in leagues for season in seasons
+               if checkpoint.get(checkpoint_key(league_id, season), {}).get("status") != "done"]
+    print(f"Backfilling {len(pending)} league seasons "
+          f"({len(leagues) * len(seasons) - len(pending)} already done)")
+
+    total_fixtures = 0
+    started = time.monotonic()
+    for start in range(0, len(pending), concurrency):
+        batch = pending[start:start + concurrency]
+        payloads = fetch_many(batch, max_concurrency=concurrency)
+
+        failed = 0
+        for league_id, season in batch:
+            key = checkpoint_key(league_id, season)
+            payload = payloads[(league_id, season)]
+            if payload['fixtures'] is None:
+                failed += 1
+                checkpoint[key] = {"status": "failed",
+                                   "updated": datetime.utcnow().isoformat()}
+                save_checkpoint(checkpoint_path, checkpoint)
+                continue
+
+            pair_started = time.monotonic()
+            try:
+                fixtures = backfill_pair(league_id, season, payload)
+            except Exception as e:
+                failed += 1
+                log_error(f"Backfill failed for league {league_id}, season {season}", e)
+                checkpoint[key] = {"status": "failed",
+                                   "updated": datetime.utcnow().isoformat()}
+                save_checkpoint(checkpoint_path, checkpoint)
+                continue
+
+            if fixtures is None:
+                print(f"League {league_id}, season {season} is being synced "
+                      "elsewhere, leaving it for the next run")
+                continue
+
+            elapsed = time.monotonic() - pair_started
+            total_fixtures += fixtures
+            if not standings_stored(league_id, season):
+                print(f"League {league_id}, season {season}: {fixtures} fixtures "
+                      "but no standings, leaving it for the next run")
+                checkpoint[key] = {"status": "partial",
+                                   "fixtures": fixtures,
+                                   "updated": datetime.utcnow().isoformat()}
+                save_checkpoint(checkpoint_path, checkpoint)
+                continue
+
+            checkpoint[key] = {"status": "done",
+                               "fixtures": fixtures,
+                               "updated": datetime.utcnow().isoformat()}
+            save_checkpoint(checkpoint_path, checkpoint)
+            print(f"League {league_id}, season {season}: {fixtures} fixtures "
+                  f"in {elapsed:.1f}s")
+
+        if failed == len(batch):
+            # Nothing in the batch could be fetched, most likely the quota ran out
+            print("Every request in the batch failed, stopping. "
+                  "Rerun the backfill to resume.")
+            break
+
+    elapsed = time.monotonic() - started
+    rate = total_fixtures / elapsed if elapsed else 0
+    print(f"Backfilled {total_fixtures} fixtures in {elapsed:.1f}s "
+          f"({rate:.1f} fixtures/s)")
+    return total_fixtures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load historical seasons for many leagues into the database")
+    parser.add_argument("--league", type=int, action="append",
+                        help="League API id to load (default: all available leagues)")
+    parser.add_argument("--from-season", type=int, required=True,
+                        help="First season to load, e.g. 2015")
+    parser.add_argument("--to-season", type=int, default=None,
+                        help="Last season to load (default: --from-season)")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY,
+                        help=f"League seasons fetched at once (default: {MAX_CONCURRENCY})")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE,
+                        help=f"Checkpoint file (default: {CHECKPOINT_FILE})")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore the checkpoint and load everything again")
+    args = parser.parse_args()
+
+    leagues = args.league or [int(league_id) for league_id in AVAILABLE_LEAGUES]
+    to_season = args.to_season or args.from_season
+    seasons = list(range(min(args.from_season, to_season),
+                         max(args.from_season, to_season) + 1))
+
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    if not init_db():
+        raise SystemExit(log_error("Database initialization failed"))
+
+    backfill(leagues, seasons, args.concurrency, args.checkpoint)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Shared setup for the benchmarks. Importing this module points the app at
+the scratch SQLite database the tests use, so import it before any
+application module.
+"""
+import atexit
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+# Sets DATABASE_URL, so it has to come before the app's modules
+from tests import conftest
+from db.database import SessionLocal, engine
+from db.models import Base, Standings, TeamSeasonStats
+from db.season_stats import refresh_season_stats
+
+# Remove the scratch database when the benchmark exits, as pytest would
+atexit.register(conftest.pytest_sessionfinish, None, 0)
+
+
+def fresh_database():
+    """Drop and recreate every table"""
+    SessionLocal.remove()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def seed_standings(db, league_id, season):
+    """
+    Store season stats and a standings table for a seeded league season,
+    ranked by points from the stats
+    """
+    refresh_season_stats(db, league_id, season)
+    stats = (db.query(TeamSeasonStats).filter_by(league_id=league_id,
+                                                season=season).order_by(
+                                                    TeamSeasonStats.points.desc(),
+                                                    TeamSeasonStats.team_id).all())
+    for position, row in enumerate(stats, start=1):
+        db.add(Standings(season=season,
+                         league_id=league_id,
+                         team_id=row.team_id,
+                         position=position,
+                         points=row.points,
+                         points_deduction=0,
+                         matches_played=row.played,
+                         goals_for=row.goals_for,
+                         goals_against=row.goals_against,
+                         goal_difference=row.goals_for - row.goals_against))
+    db.commit()
+
+
+@contextmanager
+def counted_queries():
+    """Collect the statements sent to the database while the block runs"""
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def timed(action, repeat=1):
+    """Run action repeat times and return (best wall time in seconds, result)"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = action()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def print_table(headers, rows):
+    """Print rows as a plain text table with right-aligned columns"""
+    cells = [headers] + [[str(cell) for cell in row] for row in rows]
+    widths = [max(len(row[column]) for row in cells)
+              for column in range(len(headers))]
+    for index, row in enumerate(cells):
+        print("  ".join(cell.rjust(width) for cell, width in zip(row, widths)))
+        if index == 0:
+            print("  ".join("-" * width for width in widths))
+
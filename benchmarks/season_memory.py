@@ -0,0 +1,125 @@
+"""
+Compare the memory held by SeasonData with the per-team lists of match
+dicts it replaced, for every available league and season.
+
+    python -m benchmarks.season_memory
+"""
+import argparse
+import sys
+
+import pandas as pd
+
+from benchmarks.common import fresh_database, print_table
+from tests.conftest import seed_season
+from db.database import session_factory
+from db.models import Match
+from utils.api import AVAILABLE_LEAGUES, AVAILABLE_SEASONS
+from utils.points_engine import team_match_results
+from utils.season_data import SeasonData
+
+# Teams per league, each seeded as a double round-robin season
+LEAGUE_TEAMS = {
+    "39": 20,
+    "40": 24,
+    "140": 20,
+    "61": 18,
+    "78": 18,
+    "135": 20,
+    "179": 12,
+    "253": 29,
+}
+
+
+def deep_size(value, seen=None):
+    """Size in bytes of value and every object it references, each counted once"""
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(key, seen) + deep_size(item, seen)
+                    for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(deep_size(item, seen) for item in value)
+    return size
+
+
+def nested_matches(results, team_ids):
+    """The per-team lists of match dicts that SeasonData replaced"""
+    results_by_team = dict(list(results.groupby('team', sort=False)))
+    nested = {}
+    for team_id in team_ids:
+        team_results = results_by_team.get(team_id)
+        processed_matches = []
+        if team_results is not None:
+            for row in team_results.itertuples(index=False):
+                processed_matches.append({
+                    'date': row.date,
+                    'gameweek': row.gameweek,
+                    'result': row.result,
+                    'side': row.side,
+                    'opponent': row.opponent,
+                    'goals': {
+                        'home': row.home_score,
+                        'away': row.away_score
+                    },
+                    'cumulative_total': row.cumulative_points
+                })
+        nested[team_id] = processed_matches
+    return nested
+
+
+def season_results(db, league_id, season):
+    """Score a seeded season the way load_team_data does"""
+    matches = (db.query(Match.date, Match.home_team_id, Match.away_team_id,
+                        Match.home_score, Match.away_score).filter(
+                            Match.league_id == league_id,
+                            Match.season == season,
+                            Match.status == 'FT').order_by(
+                                Match.date, Match.id).all())
+    matches_df = pd.DataFrame(matches,
+                              columns=[
+                                  'date', 'home_team', 'away_team',
+                                  'home_score', 'away_score'
+                              ])
+    return team_match_results(matches_df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.parse_args()
+
+    fresh_database()
+    db = session_factory()
+    rows = []
+    total_arrays = total_nested = 0
+    try:
+        for league_api_id in AVAILABLE_LEAGUES:
+            for season in sorted(int(season) for season in AVAILABLE_SEASONS):
+                league_id = seed_season(db, int(league_api_id), season,
+                                        team_count=LEAGUE_TEAMS[league_api_id])
+                results = season_results(db, league_id, season)
+                team_ids = sorted(results['team'].unique().tolist())
+
+                season_data = SeasonData.from_results(results, team_ids,
+                                                      [0] * len(team_ids))
+                nested_size = deep_size(nested_matches(results, team_ids))
+                total_arrays += season_data.nbytes
+                total_nested += nested_size
+                rows.append((league_api_id, season, len(results),
+                             f"{season_data.nbytes / 1024:.1f}",
+                             f"{nested_size / 1024:.1f}",
+                             f"{nested_size / season_data.nbytes:.0f}x"))
+    finally:
+        db.close()
+
+    rows.append(("all", "", sum(row[2] for row in rows),
+                 f"{total_arrays / 1024:.1f}", f"{total_nested / 1024:.1f}",
+                 f"{total_nested / total_arrays:.0f}x"))
+    print_table(("league", "season", "team matches", "SeasonData KB",
+                 "nested dicts KB", "ratio"), rows)
+
+
+if __name__ == "__main__":
+    main()
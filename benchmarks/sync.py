@@ -0,0 +1,196 @@
+"""
+Compare writing a season's fixtures one ORM object at a time, as the sync
+did before, against the bulk INSERT ... ON CONFLICT upsert in sync_matches.
+
+    python -m benchmarks.sync [--teams 20] [--repeat 3]
+"""
+import argparse
+import contextlib
+import io
+import tempfile
+from datetime import date, timedelta
+
+import pandas as pd
+
+from benchmarks.common import counted_queries, fresh_database, print_table, timed
+from tests.conftest import api_fixture, payload_factory
+from db.database import get_db
+from db.models import League, Match, Team
+from db.season_stats import refresh_season_stats
+from utils.data_sync import sync_matches
+
+
+def season_fixtures(team_count, start=date(2023, 8, 12)):
+    """Build a finished double round-robin season as API fixtures"""
+    teams = [(39000 + number, f"Team {number}") for number in range(team_count)]
+    fixtures = []
+    for round_number in range(2 * (team_count - 1)):
+        offset = round_number % (team_count - 1) + 1
+        second_half = round_number >= team_count - 1
+        for home_index in range(team_count):
+            away_index = (home_index + offset) % team_count
+            if (home_index > away_index) != second_half:
+                continue
+            fixtures.append(api_fixture(
+                len(fixtures) + 1, start + timedelta(days=7 * round_number),
+                teams[home_index], teams[away_index],
+                (home_index + round_number) % 4,
+                (away_index + round_number) % 3, 'FT'))
+    return fixtures
+
+
+def baseline_sync(league_id: int, season: int, fixtures_payload):
+    """
+    The per-fixture write path that the bulk upsert replaced, without its
+    Streamlit progress bar and standings sync
+    """
+    fixtures = fixtures_payload.json()['response']
+    api_matches = pd.DataFrame([{
+        'fixture_id': fixture['fixture']['id'],
+        'date': fixture['fixture']['date'][:10],
+        'home_team': fixture['teams']['home']['name'],
+        'home_team_id': fixture['teams']['home']['id'],
+        'away_team': fixture['teams']['away']['name'],
+        'away_team_id': fixture['teams']['away']['id'],
+        'home_score': fixture['goals']['home'],
+        'away_score': fixture['goals']['away'],
+        'status': fixture['fixture']['status']['short'],
+        'league_name': fixture['league']['name'],
+    } for fixture in fixtures])
+
+    db = next(get_db())
+    try:
+        league = db.query(League).filter_by(api_id=league_id).first()
+        if not league:
+            league = League(api_id=league_id,
+                            name=api_matches['league_name'].iloc[0])
+            db.add(league)
+            db.commit()
+
+        unique_teams = pd.concat([
+            api_matches[['home_team', 'home_team_id']].rename(
+                columns={'home_team': 'name', 'home_team_id': 'api_id'}),
+            api_matches[['away_team', 'away_team_id']].rename(
+                columns={'away_team': 'name', 'away_team_id': 'api_id'})
+        ]).drop_duplicates(subset=['api_id'])
+        existing_teams = {
+            t.api_id: t
+            for t in db.query(Team).filter(
+                Team.api_id.in_(unique_teams['api_id'].tolist())).all()
+        }
+        for _, team_data in unique_teams.iterrows():
+            if team_data['api_id'] not in existing_teams:
+                team = Team(api_id=team_data['api_id'], name=team_data['name'])
+                db.add(team)
+                db.commit()
+                existing_teams[team_data['api_id']] = team
+
+        existing_matches = {
+            m.api_id: m
+            for m in db.query(Match).filter(
+                Match.api_id.in_(api_matches['fixture_id'].tolist())).all()
+        }
+
+        changed_team_ids = set()
+        batch_size = 50
+        for start in range(0, len(api_matches), batch_size):
+            new_matches = []
+            for _, row in api_matches.iloc[start:start + batch_size].iterrows():
+                home_team = existing_teams[row['home_team_id']]
+                away_team = existing_teams[row['away_team_id']]
+                match = existing_matches.get(row['fixture_id'])
+
+                home_score = int(row['home_score']) if pd.notna(
+                    row['home_score']) else None
+                away_score = int(row['away_score']) if pd.notna(
+                    row['away_score']) else None
+                match_date = pd.to_datetime(row['date']).date()
+
+                if match:
+                    if (match.home_score, match.away_score, match.status,
+                            match.date) != (home_score, away_score,
+                                            row['status'], match_date):
+                        match.home_score = home_score
+                        match.away_score = away_score
+                        match.status = row['status']
+                        match.date = match_date
+                        changed_team_ids.update((home_team.id, away_team.id))
+                else:
+                    new_match = Match(api_id=row['fixture_id'],
+                                      date=match_date,
+                                      season=season,
+                                      league_id=league.id,
+                                      home_team_id=home_team.id,
+                                      away_team_id=away_team.id,
+                                      home_score=home_score,
+                                      away_score=away_score,
+                                      status=row['status'])
+                    new_matches.append(new_match)
+                    existing_matches[row['fixture_id']] = new_match
+                    changed_team_ids.update((home_team.id, away_team.id))
+
+            if new_matches:
+                db.bulk_save_objects(new_matches)
+            db.commit()
+
+        refresh_season_stats(db, league.id, season, changed_team_ids)
+        db.commit()
+        return len(api_matches)
+    finally:
+        db.close()
+
+
+def bulk_sync(full_sync):
+    def run(league_id, season, fixtures_payload):
+        # An empty standings frame keeps the sync away from the API
+        return sync_matches(league_id, season, full_sync=full_sync,
+                            fixtures_payload=fixtures_payload,
+                            standings_df=pd.DataFrame())
+    return run
+
+
+def measure(sync, make_payload, fixtures, repeat):
+    """
+    Time a first sync into empty tables and a re-sync of an identical
+    payload. Returns the best (seconds, queries) of each over repeat runs.
+    """
+    first = resync = None
+    for _ in range(repeat):
+        fresh_database()
+        runs = []
+        for payload in (make_payload(fixtures), make_payload(fixtures)):
+            with counted_queries() as statements, \
+                    contextlib.redirect_stdout(io.StringIO()):
+                elapsed, _ = timed(lambda: sync(39, 2023, payload))
+            runs.append((elapsed, len(statements)))
+        first = min(first or runs[0], runs[0])
+        resync = min(resync or runs[1], runs[1])
+    return first, resync
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--teams", type=int, default=20,
+                        help="Teams in the synced season (default: 20)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Runs per path, the best is reported (default: 3)")
+    args = parser.parse_args()
+
+    fixtures = season_fixtures(args.teams)
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        make_payload = payload_factory(directory)
+        for name, sync in (("per-fixture ORM", baseline_sync),
+                           ("bulk upsert", bulk_sync(full_sync=True)),
+                           ("bulk upsert, incremental", bulk_sync(full_sync=False))):
+            first, resync = measure(sync, make_payload, fixtures, args.repeat)
+            rows.append((name, f"{first[0] * 1000:.1f}", first[1],
+                         f"{resync[0] * 1000:.1f}", resync[1]))
+
+    print(f"{len(fixtures)} fixtures, best of {args.repeat} runs\n")
+    print_table(("path", "first sync ms", "queries", "re-sync ms", "queries"),
+                rows)
+
+
+if __name__ == "__main__":
+    main()
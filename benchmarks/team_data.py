@@ -0,0 +1,115 @@
+"""
+Compare loading a season's team data with one query per team, as the app
+did before, against the single matches query in load_team_data.
+
+    python -m benchmarks.team_data [--teams 20] [--repeat 5]
+"""
+import argparse
+
+from benchmarks.common import (counted_queries, fresh_database, print_table,
+                               seed_standings, timed)
+from tests.conftest import seed_season
+from db.database import get_db, session_factory
+from db.models import League, Match, Standings, Team
+from utils.api import load_team_data
+
+
+def baseline_team_data(league_id: int, season: int):
+    """The per-team match query loop that load_team_data replaced"""
+    db = next(get_db())
+    try:
+        league = db.query(League).filter_by(api_id=league_id).first()
+        if not league:
+            return []
+
+        teams_with_standings = (db.query(Team, Standings).join(
+            Standings, Team.id == Standings.team_id).filter(
+                Standings.league_id == league.id,
+                Standings.season == season).all())
+
+        team_data = []
+        for team, standing in teams_with_standings:
+            matches = (db.query(Match).filter(
+                Match.league_id == league.id, Match.season == season,
+                Match.status == 'FT',
+                ((Match.home_team_id == team.id) |
+                 (Match.away_team_id == team.id))).order_by(Match.date).all())
+
+            processed_matches = []
+            cumulative_points = 0
+            for match in matches:
+                is_home = match.home_team_id == team.id
+                team_score = match.home_score if is_home else match.away_score
+                opp_score = match.away_score if is_home else match.home_score
+                if team_score > opp_score:
+                    result = 'win'
+                    cumulative_points += 3
+                elif team_score == opp_score:
+                    result = 'draw'
+                    cumulative_points += 1
+                else:
+                    result = 'loss'
+
+                processed_matches.append({
+                    'date': match.date,
+                    'gameweek': len(processed_matches) + 1,
+                    'result': result,
+                    'side': 'home' if is_home else 'away',
+                    'opponent': match.away_team_id if is_home else match.home_team_id,
+                    'goals': {
+                        'home': match.home_score,
+                        'away': match.away_score
+                    },
+                    'cumulative_total': cumulative_points - standing.points_deduction
+                })
+
+            team_data.append({
+                'id': team.id,
+                'name': team.name,
+                'total_points': standing.points,
+                'matches': processed_matches
+            })
+        return team_data
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--teams", type=int, default=20,
+                        help="Teams in the measured league season (default: 20)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Runs per loader, the best is reported (default: 5)")
+    args = parser.parse_args()
+
+    # The measured season shares the tables with two others, as in the app
+    fresh_database()
+    db = session_factory()
+    try:
+        seed_season(db, 39, 2022, team_count=args.teams)
+        seed_standings(db, seed_season(db, 39, 2023, team_count=args.teams), 2023)
+        seed_season(db, 40, 2023, team_count=24)
+    finally:
+        db.close()
+
+    rows = []
+    match_counts = {}
+    for name, loader in (("per-team queries", baseline_team_data),
+                         ("load_team_data", load_team_data)):
+        with counted_queries() as statements:
+            loader(39, 2023)
+        elapsed, team_data = timed(lambda: loader(39, 2023), args.repeat)
+        match_counts[name] = sorted((team['id'], len(team['matches']))
+                                    for team in team_data)
+        rows.append((name, len(team_data), len(statements),
+                     f"{elapsed * 1000:.1f}"))
+
+    print(f"{args.teams} teams, {args.teams * (args.teams - 1)} matches, "
+          f"best of {args.repeat} runs\n")
+    print_table(("loader", "teams", "queries", "wall ms"), rows)
+    if len({tuple(counts) for counts in match_counts.values()}) != 1:
+        raise SystemExit("The loaders disagree on the teams' matches")
+
+
+if __name__ == "__main__":
+    main()
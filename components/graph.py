@@ -1,54 +1,109 @@
+import os
+
+import numpy as np
 import plotly.graph_objects as go
 import streamlit as st
 from utils.data_processor import get_team_colors
+from utils.lru_cache import LRUCache
+
+# Above this many points the chart switches to WebGL and decimated lines
+HIGH_VOLUME_POINTS = int(
+    os.getenv("FOOTBALL_DASHBOARD_HIGH_VOLUME_POINTS", "5000"))
+
+HOVER_TEMPLATE = ("<b>%{fullData.name}</b><br>"
+                  "Match %{x}<br>"
+                  "Points: %{y}<br>"
+                  "GD: %{customdata:+d}<extra></extra>")
+
+# Figures keyed by the cache_key passed to plot_cumulative_points
+_figure_cache = LRUCache(maxsize=32)
+
+
+def decimate_line(x, y):
+    """
+    Return the indices of the points where a line changes direction. The
+    points in between lie on the straight segments, so dropping them does
+    not change what is drawn.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) <= 2:
+        return np.arange(len(x))
 
+    dx = np.diff(x)
+    dy = np.diff(y)
+    turns = dy[1:] * dx[:-1] != dy[:-1] * dx[1:]
+    return np.concatenate(([0], np.flatnonzero(turns) + 1, [len(x) - 1]))
 
-def plot_cumulative_points(points_df):
-    """Create an interactive line plot showing cumulative points over time"""
+
+def payload_size(fig):
+    """Size in bytes of the JSON sent to the browser for a figure"""
+    return len(fig.to_json().encode('utf-8'))
+
+
+def plot_cumulative_points(points_df, cache_key=None, high_volume=None):
+    """
+    Create an interactive line plot showing cumulative points over time.
+    Pass cache_key, e.g. (league, season, data version, selected teams), to
+    reuse the figure built for the same data.
+
+    High-volume mode draws WebGL traces without splines and drops points
+    that lie on straight segments. It is used above HIGH_VOLUME_POINTS
+    points unless high_volume is set explicitly.
+    """
     if points_df.empty:
         st.warning(
             "No match data available for the selected league and season.")
         return go.Figure()
 
+    if high_volume is None:
+        high_volume = len(points_df) > HIGH_VOLUME_POINTS
+
+    if cache_key is not None:
+        cache_key = (cache_key, high_volume)
+        fig = _figure_cache.get(cache_key)
+        if fig is not None:
+            return fig
+
     # Create figure with sophisticated styling
     fig = go.Figure()
 
-    # Sort teams by their final points (using last point for each team)
-    final_points = points_df.groupby('team')['points'].last()
-    final_points = final_points.sort_values(ascending=False)
-    sorted_teams = final_points.index.tolist()
+    # Split the frame by team once and sort teams by their final points
+    teams = dict(list(points_df.groupby('team', sort=False)))
+    sorted_teams = sorted(teams,
+                          key=lambda team: teams[team]['points'].iloc[-1],
+                          reverse=True)
+    team_colors = get_team_colors()
+    trace_type = go.Scattergl if high_volume else go.Scatter
 
     # Add traces for each team
     for team in sorted_teams:
-        team_data = points_df[points_df['team'] == team]
-        team_colors_dict = get_team_colors().get(team, {
+        team_data = teams[team]
+        if high_volume:
+            team_data = team_data.iloc[decimate_line(
+                team_data['matches_played'], team_data['points'])]
+        team_colors_dict = team_colors.get(team, {
             'primary': '#808080',
             'secondary': '#404040'
         })
 
-        # Create hover text that includes key stats
-        hover_text = [
-            f"<b>{team}</b><br>"
-            f"Match {row['matches_played']}<br>"
-            f"Points: {int(row['points'])}<br>"
-            f"GD: {row['goal_difference']:+d}"
-            for _, row in team_data.iterrows()
-        ]
+        line = dict(
+            color=team_colors_dict['primary'],  # Use primary color for lines
+            width=3)
+        if not high_volume:
+            # WebGL traces only draw straight segments
+            line.update(shape='spline', smoothing=0.8)
 
         fig.add_trace(
-            go.Scatter(
+            trace_type(
                 x=team_data['matches_played'],
                 y=team_data['points'],
                 name=team,
                 mode='lines',
-                line=dict(
-                    color=team_colors_dict[
-                        'primary'],  # Use primary color for lines
-                    width=3,
-                    shape='spline',
-                    smoothing=0.8),
-                hovertemplate="%{text}<extra></extra>",
-                text=hover_text))
+                line=line,
+                # Hover text with key stats is formatted in the browser
+                customdata=team_data['goal_difference'],
+                hovertemplate=HOVER_TEMPLATE))
 
     # Enhanced layout with dark theme and forced y-axis range
     min_points = points_df['points'].min()
@@ -108,4 +163,6 @@ def plot_cumulative_points(points_df):
         ),
         margin=dict(l=60, r=160, t=40, b=60))
 
+    if cache_key is not None:
+        _figure_cache.put(cache_key, fig)
     return fig
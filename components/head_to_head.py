@@ -1,6 +1,6 @@
 import streamlit as st
 
-from utils.api import fetch_head_to_head_from_api
+from utils.api import get_head_to_head_summary
 
 
 def display_head_to_head(team_data):
@@ -28,11 +28,19 @@ def display_head_to_head(team_data):
             unsafe_allow_html=True)
 
     with col2:
+        # A team cannot be compared with itself
+        opponent_options = [
+            option for option in team_options if option[1] != team1_id
+        ]
         selected_team2 = st.selectbox("Select Second Team",
-                                      team_options,
+                                      opponent_options,
                                       format_func=lambda option: option[0],
                                       key="team2_select")
-        team2_name, team2_id = selected_team2
+
+    if selected_team2 is None:
+        st.warning("Select two different teams to compare.")
+        return
+    team2_name, team2_id = selected_team2
 
     # Get team data
     team1_data = next((team for team in team_data if team['id'] == team1_id),
@@ -78,11 +86,22 @@ def display_head_to_head(team_data):
                       delta=team1_data['position'] - team2_data['position'],
                       delta_color="normal")
 
-        # Query all matches between the two teams
-
-        h2h_matches = fetch_head_to_head_from_api(team1_data, team2_data)
+        # Look up the precomputed record of the two teams
+        h2h = get_head_to_head_summary(team1_data, team2_data)
+        h2h_matches = h2h['matches']
 
         if h2h_matches:
+            st.markdown("### Head-to-Head Record")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric(label=f"{team1_name} Wins", value=h2h['team1_wins'])
+            with col2:
+                st.metric(label="Draws", value=h2h['draws'])
+            with col3:
+                st.metric(label=f"{team2_name} Wins", value=h2h['team2_wins'])
+            st.caption(f"{h2h['played']} meetings, goals "
+                       f"{h2h['team1_goals']} - {h2h['team2_goals']}")
+
             st.markdown("### Head-to-Head Matches")
             for match in h2h_matches:
                 with st.container():
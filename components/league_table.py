@@ -1,6 +1,9 @@
+import re
+
+import numpy as np
 import streamlit as st
-import base64
 from utils.data_processor import get_team_colors
+from utils.lru_cache import LRUCache
 
 
 def format_form(form_string):
@@ -22,75 +25,93 @@ def format_form(form_string):
     return form_html
 
 
+DEFAULT_SPARKLINE_COLORS = {
+    'primary': "rgba(255,255,255,0.7)",
+    'secondary': "rgba(255,255,255,0.3)"
+}
+
+# Rendered sparklines keyed by (league id, season, team id, data version,
+# max points, size). data_version is only unique within a league season.
+_sparkline_cache = LRUCache(maxsize=1024)
+
+
+def gradient_id(team_colors):
+    """Return the id of the shared gradient for a pair of team colors"""
+    colors = f"{team_colors['primary']}-{team_colors['secondary']}"
+    return "spark-" + re.sub(r"[^0-9A-Za-z-]", "", colors)
+
+
+def gradient_defs(color_pairs):
+    """
+    Build one hidden SVG holding a gradient per distinct pair of colors, for
+    the sparklines on the page to refer to by id.
+    """
+    gradients = {}
+    for team_colors in color_pairs:
+        gradients.setdefault(
+            gradient_id(team_colors),
+            f'<linearGradient id="{gradient_id(team_colors)}" x1="0" y1="0" x2="0" y2="1">'
+            f'<stop offset="0" stop-color="{team_colors["primary"]}"/>'
+            f'<stop offset="1" stop-color="{team_colors["secondary"]}"/>'
+            '</linearGradient>')
+    return ('<svg width="0" height="0" style="position:absolute" aria-hidden="true">'
+            f'<defs>{"".join(gradients.values())}</defs></svg>')
+
+
+def _format_coord(value):
+    return f"{value:.1f}".rstrip("0").rstrip(".")
+
+
 def create_sparkline(matches,
                      team_colors=None,
                      max_points=100,
                      width=100,
                      height=30):
-    """Create a sparkline SVG from match points progression"""
+    """
+    Create an inline sparkline SVG from match points progression. The
+    stroke uses the shared gradient for team_colors from gradient_defs.
+    """
     if not matches:
         return ""
 
     # Get cumulative points for each match
-    points = [match['cumulative_total'] for match in matches]
+    points = matches.cumulative_totals.astype(float)
 
     # Calculate min and max for scaling
     min_points = 0
     point_range = max(1, max_points - min_points)  # Avoid division by zero
 
-    # Create point coordinates
+    # Create point coordinates, rounded to keep the path short
     x_step = width / (len(points) - 1) if len(points) > 1 else 0
-    points_coords = []
-
-    for i, point in enumerate(points):
-        x = i * x_step
-        # Scale y to fit height, inverting because SVG y=0 is top
-        y = height - ((point - min_points) / point_range * height)
-        points_coords.append(f"{x},{y}")
-
-    # Create SVG path
-    path = f"M{' L'.join(points_coords)}"
-
-    # Use team colors if provided, otherwise default to white
-    primary_color = team_colors[
-        'primary'] if team_colors else "rgba(255,255,255,0.7)"
-    secondary_color = team_colors[
-        'secondary'] if team_colors else "rgba(255,255,255,0.3)"
-
-    svg = f"""
-    <svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" style="display: inline-block; vertical-align: middle;">
-        <defs>
-            <linearGradient id="gradient" x1="0%" y1="0%" x2="0%" y2="100%">
-                <stop offset="0%" style="stop-color:{primary_color};stop-opacity:1" />
-                <stop offset="100%" style="stop-color:{secondary_color};stop-opacity:1" />
-            </linearGradient>
-        </defs>
-        <path 
-            d="{path}" 
-            stroke="url(#gradient)" 
-            stroke-width="2" 
-            fill="none" 
-            vector-effect="non-scaling-stroke"
-        />
-    </svg>
-    """
-    b64 = base64.b64encode(svg.encode('utf-8')).decode("utf-8")
-    return r'<img src="data:image/svg+xml;base64,%s"/>' % b64
-
+    xs = np.arange(len(points)) * x_step
+    # Scale y to fit height, inverting because SVG y=0 is top
+    ys = height - ((points - min_points) / point_range * height)
+    path = "M" + "L".join(f"{_format_coord(x)},{_format_coord(y)}"
+                          for x, y in zip(xs.tolist(), ys.tolist()))
+
+    stroke = gradient_id(team_colors or DEFAULT_SPARKLINE_COLORS)
+    return (f'<svg width="{width}" height="{height}" '
+            'style="display:inline-block;vertical-align:middle">'
+            f'<path d="{path}" stroke="url(#{stroke})" stroke-width="2" '
+            'fill="none" vector-effect="non-scaling-stroke"/></svg>')
+
+
+def cached_sparkline(team, team_colors, max_points, width=100, height=30):
+    """create_sparkline for a team, cached per league season, data version and size"""
+    key = (team['league_id'], team['season'], team['id'], team['data_version'],
+           max_points, width, height)
+    sparkline = _sparkline_cache.get(key)
+    if sparkline is None:
+        sparkline = create_sparkline(team['matches'],
+                                     team_colors=team_colors,
+                                     max_points=max_points,
+                                     width=width,
+                                     height=height)
+        _sparkline_cache.put(key, sparkline)
+    return sparkline
 
-def display_league_table(team_data):
-    """Display league table with all statistics"""
-    if not team_data:
-        st.warning("No data available for the selected league and season.")
-        return
 
-    # Sort teams by points (considering deductions)
-    sorted_teams = sorted(team_data,
-                          key=lambda x: (x['position']),
-                          reverse=False)
-
-    # First, inject the CSS separately
-    st.html("""
+TABLE_CSS = """
     <style>
     .league-table {
         font-family: monospace;
@@ -121,13 +142,9 @@ def display_league_table(team_data):
     .points-cell { width: 70px; text-align: center; font-weight: bold; }
     .trend-cell { width: 120px; text-align: center; }
     </style>
-    """)
-
-    # Then build and inject the table HTML separately
-    table_rows = []
+"""
 
-    # Add header row
-    header_row = """
+TABLE_HEADER = """
         <tr>
             <th class="pos-cell">#</th>
             <th class="team-cell">Team</th>
@@ -141,46 +158,76 @@ def display_league_table(team_data):
             <th class="points-cell">PTS</th>
             <th class="trend-cell">Trend</th>
         </tr>
+"""
+
+# Table rows keyed by (league id, season, team id, data version, max points)
+_row_cache = LRUCache(maxsize=1024)
+
+
+def table_row(team, team_colour, max_points):
     """
-    table_rows.append(header_row)
+    Return the table row markup for a team, cached per league season, data
+    version and sparkline scale so a filter change only re-assembles cached
+    rows.
+    """
+    key = (team['league_id'], team['season'], team['id'], team['data_version'],
+           max_points)
+    row = _row_cache.get(key)
+    if row is None:
+        form_display = format_form(team['form']) if team['form'] else ""
+        sparkline = cached_sparkline(team, team_colour, max_points)
+
+        row = f"""
+            <tr>
+                <td class="pos-cell">{team['position']}</td>
+                <td class="team-cell" style="color: {team_colour['primary']}">{team['name']}</td>
+                <td class="num-cell">{team['matches_played']}</td>
+                <td class="num-cell">{team['wins']}</td>
+                <td class="num-cell">{team['draws']}</td>
+                <td class="num-cell">{team['losses']}</td>
+                <td class="num-cell">{team['goal_difference']:+d}</td>
+                <td class="goals-cell">{team['goals_for']}:{team['goals_against']}</td>
+                <td class="form-cell">{form_display}</td>
+                <td class="points-cell">{team['total_points']}</td>
+                <td class="trend-cell">{sparkline}</td>
+            </tr>
+        """
+        _row_cache.put(key, row)
+    return row
+
 
-    # Add data rows
+def display_league_table(team_data):
+    """Display league table with all statistics"""
+    if not team_data:
+        st.warning("No data available for the selected league and season.")
+        return
+
+    # Sort teams by points (considering deductions)
+    sorted_teams = sorted(team_data,
+                          key=lambda x: (x['position']),
+                          reverse=False)
+
+    # First, inject the CSS separately
+    st.html(TABLE_CSS)
+
+    # Then assemble the table from the cached rows
     team_colors = get_team_colors()
     max_points = max(team['total_points'] for team in sorted_teams)
 
+    table_rows = [TABLE_HEADER]
+    team_colours = []
     for team in sorted_teams:
-        wins = sum(1 for m in team['matches'] if m['result'] == 'win')
-        draws = sum(1 for m in team['matches'] if m['result'] == 'draw')
-        losses = sum(1 for m in team['matches'] if m['result'] == 'loss')
         team_colour = team_colors.get(team['name'], {
             'primary': '#808080',
             'secondary': '#404040'
         })
-
-        form_display = format_form(team['form']) if team['form'] else ""
-        sparkline = create_sparkline(team['matches'],
-                                     team_colors=team_colour,
-                                     max_points=max_points)
-
-        row = f"""
-        <tr>
-            <td class="pos-cell">{team['position']}</td>
-            <td class="team-cell" style="color: {team_colour['primary']}">{team['name']}</td>
-            <td class="num-cell">{team['matches_played']}</td>
-            <td class="num-cell">{wins}</td>
-            <td class="num-cell">{draws}</td>
-            <td class="num-cell">{losses}</td>
-            <td class="num-cell">{team['goal_difference']:+d}</td>
-            <td class="goals-cell">{team['goals_for']}:{team['goals_against']}</td>
-            <td class="form-cell">{form_display}</td>
-            <td class="points-cell">{team['total_points']}</td>
-            <td class="trend-cell">{sparkline}</td>
-        </tr>
-        """
-        table_rows.append(row)
+        team_colours.append(team_colour)
+        table_rows.append(table_row(team, team_colour, max_points))
 
     # Combine all rows into a single table
-    table_html = f'<table class="league-table">{"".join(table_rows)}</table>'
+    # The sparklines share one gradient per colour pair
+    table_html = (gradient_defs(team_colours) +
+                  f'<table class="league-table">{"".join(table_rows)}</table>')
 
     # Render the table
     st.html(table_html)
@@ -0,0 +1,127 @@
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import case, select
+from sqlalchemy.orm import Session
+
+from .models import HeadToHead, Match
+from .upsert import upsert_statement
+
+# Number of meetings kept per pair for the head-to-head view
+RECENT_MEETINGS = 10
+
+
+def pair_key(team_a_id: int, team_b_id: int):
+    """Return the unordered pair of two team ids as (lower id, higher id)"""
+    if team_a_id == team_b_id:
+        raise ValueError(f"team {team_a_id} cannot be paired with itself")
+    return (team_a_id, team_b_id) if team_a_id < team_b_id else (team_b_id, team_a_id)
+
+
+def refresh_head_to_head(db: Session, pairs):
+    """
+    Recompute the head-to-head summaries of the given team pairs from their
+    finished matches. Pairs that have never met get an empty summary, so
+    looking them up stays a primary key hit. Pairs can be given in either
+    order; a team paired with itself is skipped. The caller is responsible
+    for committing.
+    """
+    pairs = {pair_key(*pair) for pair in pairs if pair[0] != pair[1]}
+    if not pairs:
+        return
+
+    # Read every finished match between the teams involved and keep the
+    # ones between a requested pair
+    team_ids = {team_id for pair in pairs for team_id in pair}
+    matches = (db.query(Match.date, Match.home_team_id, Match.away_team_id,
+                        Match.home_score, Match.away_score).filter(
+                            Match.status == 'FT',
+                            Match.home_team_id.in_(team_ids),
+                            Match.away_team_id.in_(team_ids)).order_by(
+                                Match.date.desc(), Match.id.desc()).all())
+    meetings = defaultdict(list)
+    for match in matches:
+        if match.home_team_id == match.away_team_id:
+            continue
+        pair = pair_key(match.home_team_id, match.away_team_id)
+        if pair in pairs:
+            meetings[pair].append(match)
+
+    rows = []
+    for low_id, high_id in sorted(pairs):
+        pair_matches = meetings[(low_id, high_id)]
+        row = {
+            'team_low_id': low_id,
+            'team_high_id': high_id,
+            'played': len(pair_matches),
+            'low_wins': 0,
+            'draws': 0,
+            'high_wins': 0,
+            'low_goals': 0,
+            'high_goals': 0,
+            'recent_meetings': [{
+                'date': match.date.isoformat(),
+                'home_team_id': match.home_team_id,
+                'away_team_id': match.away_team_id,
+                'home_score': match.home_score,
+                'away_score': match.away_score
+            } for match in pair_matches[:RECENT_MEETINGS]],
+            'last_updated': datetime.utcnow(),
+        }
+        for match in pair_matches:
+            if match.home_team_id == low_id:
+                low_goals, high_goals = match.home_score, match.away_score
+            else:
+                low_goals, high_goals = match.away_score, match.home_score
+            row['low_goals'] += low_goals
+            row['high_goals'] += high_goals
+            if low_goals > high_goals:
+                row['low_wins'] += 1
+            elif low_goals < high_goals:
+                row['high_wins'] += 1
+            else:
+                row['draws'] += 1
+        rows.append(row)
+
+    db.execute(
+        upsert_statement(db, HeadToHead, ['team_low_id', 'team_high_id'], [
+            'played', 'low_wins', 'draws', 'high_wins', 'low_goals',
+            'high_goals', 'recent_meetings', 'last_updated'
+        ],
+                         only_changed=False).values(rows))
+
+
+def missing_pairs(db: Session):
+    """Return the team pairs that have played each other but have no summary"""
+    low_id = case((Match.home_team_id < Match.away_team_id, Match.home_team_id),
+                  else_=Match.away_team_id)
+    high_id = case((Match.home_team_id < Match.away_team_id, Match.away_team_id),
+                   else_=Match.home_team_id)
+    return set(
+        db.execute(
+            select(low_id, high_id).distinct().outerjoin(
+                HeadToHead, (HeadToHead.team_low_id == low_id) &
+                (HeadToHead.team_high_id == high_id)).where(
+                    HeadToHead.team_low_id.is_(None),
+                    Match.home_team_id != Match.away_team_id)).all())
+
+
+def get_head_to_head(db: Session,
+                     team_a_id: int,
+                     team_b_id: int,
+                     build_missing: bool = True):
+    """
+    Return the head-to-head summary of two teams by primary key. With
+    build_missing, a pair that has no summary yet is built from the matches
+    and stored; otherwise None is returned and the pair is left to the sync.
+    A team has no record against itself, so equal ids return None.
+    """
+    if team_a_id == team_b_id:
+        return None
+    key = pair_key(team_a_id, team_b_id)
+    summary = db.get(HeadToHead, key)
+    if summary is None and build_missing:
+        refresh_head_to_head(db, [key])
+        db.commit()
+        summary = db.get(HeadToHead, key)
+    return summary
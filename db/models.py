@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, UniqueConstraint, DateTime
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, UniqueConstraint, DateTime, Index, Boolean, JSON, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -44,7 +44,14 @@ class Match(Base):
     away_team = relationship("Team", back_populates="away_matches", foreign_keys=[away_team_id])
 
     __table_args__ = (
-        UniqueConstraint('season', 'league_id', 'home_team_id', 'away_team_id', name='uix_match_teams'),
+        # Season filters in needs_refresh and the sync
+        Index('ix_matches_league_season_status_date', 'league_id', 'season', 'status', 'date'),
+        # Finished matches only, used to build team data and season stats
+        Index('ix_matches_finished', 'league_id', 'season', 'date',
+              postgresql_where=text("status = 'FT'"),
+              sqlite_where=text("status = 'FT'")),
+        # Head-to-head lookups
+        Index('ix_matches_home_away', 'home_team_id', 'away_team_id'),
     )
 
 class Standings(Base):
@@ -70,3 +77,61 @@ class Standings(Base):
     __table_args__ = (
         UniqueConstraint('season', 'league_id', 'team_id', name='uix_standings_team'),
     )
+
+
+class TeamSeasonStats(Base):
+    """Per-season totals for each team, aggregated from finished matches"""
+    __tablename__ = 'team_season_stats'
+
+    id = Column(Integer, primary_key=True)
+    season = Column(Integer, nullable=False)
+    league_id = Column(Integer, ForeignKey('leagues.id'), nullable=False)
+    team_id = Column(Integer, ForeignKey('teams.id'), nullable=False)
+    played = Column(Integer, nullable=False)
+    wins = Column(Integer, nullable=False)
+    draws = Column(Integer, nullable=False)
+    losses = Column(Integer, nullable=False)
+    goals_for = Column(Integer, nullable=False)
+    goals_against = Column(Integer, nullable=False)
+    points = Column(Integer, nullable=False)  # Points earned on the pitch, before deductions
+    last_updated = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('season', 'league_id', 'team_id', name='uix_team_season_stats'),
+    )
+
+class SyncLock(Base):
+    """Lock row used to stop concurrent syncs of the same league and season"""
+    __tablename__ = 'sync_locks'
+
+    league_api_id = Column(Integer, primary_key=True)
+    season = Column(Integer, primary_key=True)
+    owner = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+class SyncState(Base):
+    """When a league and season was last synced and when it next needs a look"""
+    __tablename__ = 'sync_state'
+
+    league_api_id = Column(Integer, primary_key=True)
+    season = Column(Integer, primary_key=True)
+    last_synced = Column(DateTime, nullable=False)
+    next_kickoff = Column(Date)  # Earliest scheduled match that is not settled yet
+    content_hash = Column(String)  # Hash of the last fixtures payload written
+    frozen = Column(Boolean, nullable=False, default=False)  # Season is over, only rechecked weekly
+    data_version = Column(Integer, nullable=False, default=0, server_default='0')  # Bumped on every sync that changes matches or standings
+
+class HeadToHead(Base):
+    """Finished meetings between two teams, keyed by the pair with the lower id first"""
+    __tablename__ = 'head_to_head'
+
+    team_low_id = Column(Integer, ForeignKey('teams.id'), primary_key=True)
+    team_high_id = Column(Integer, ForeignKey('teams.id'), primary_key=True)
+    played = Column(Integer, nullable=False)
+    low_wins = Column(Integer, nullable=False)
+    draws = Column(Integer, nullable=False)
+    high_wins = Column(Integer, nullable=False)
+    low_goals = Column(Integer, nullable=False)
+    high_goals = Column(Integer, nullable=False)
+    recent_meetings = Column(JSON, nullable=False)  # Latest meetings, newest first
+    last_updated = Column(DateTime, nullable=False, default=datetime.utcnow)
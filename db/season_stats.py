@@ -0,0 +1,90 @@
+from datetime import datetime
+
+from sqlalchemy import case, delete, func, insert, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from .models import Match, TeamSeasonStats
+
+
+def season_stats_query(league_id: int, season: int, team_ids=None):
+    """
+    Build a single aggregate over finished matches that returns W/D/L,
+    goals and points for every team in a league and season.
+    """
+    filters = [
+        Match.league_id == league_id,
+        Match.season == season,
+        Match.status == 'FT',
+    ]
+
+    # Look at every match from both the home and the away side
+    home = select(Match.home_team_id.label('team_id'),
+                  Match.home_score.label('goals_for'),
+                  Match.away_score.label('goals_against')).where(*filters)
+    away = select(Match.away_team_id.label('team_id'),
+                  Match.away_score.label('goals_for'),
+                  Match.home_score.label('goals_against')).where(*filters)
+    if team_ids is not None:
+        home = home.where(Match.home_team_id.in_(team_ids))
+        away = away.where(Match.away_team_id.in_(team_ids))
+    results = union_all(home, away).subquery()
+
+    won = results.c.goals_for > results.c.goals_against
+    drawn = results.c.goals_for == results.c.goals_against
+    lost = results.c.goals_for < results.c.goals_against
+
+    return select(
+        literal(season).label('season'),
+        literal(league_id).label('league_id'),
+        results.c.team_id,
+        func.count().label('played'),
+        func.sum(case((won, 1), else_=0)).label('wins'),
+        func.sum(case((drawn, 1), else_=0)).label('draws'),
+        func.sum(case((lost, 1), else_=0)).label('losses'),
+        func.sum(results.c.goals_for).label('goals_for'),
+        func.sum(results.c.goals_against).label('goals_against'),
+        func.sum(case((won, 3), (drawn, 1), else_=0)).label('points'),
+        literal(datetime.utcnow()).label('last_updated'),
+    ).group_by(results.c.team_id)
+
+
+def refresh_season_stats(db: Session,
+                         league_id: int,
+                         season: int,
+                         team_ids=None):
+    """
+    Refresh the precomputed team_season_stats rows for a league and season.
+
+    Pass the ids of teams whose matches changed to only recompute their rows;
+    the whole season is rebuilt when team_ids is None or nothing has been
+    stored for the season yet. The caller is responsible for committing.
+    """
+    if team_ids is not None:
+        has_rows = db.query(TeamSeasonStats.id).filter_by(
+            league_id=league_id, season=season).first() is not None
+        if not has_rows:
+            team_ids = None
+        elif not team_ids:
+            return
+
+    stale_rows = delete(TeamSeasonStats).where(
+        TeamSeasonStats.league_id == league_id,
+        TeamSeasonStats.season == season)
+    if team_ids is not None:
+        team_ids = list(team_ids)
+        stale_rows = stale_rows.where(TeamSeasonStats.team_id.in_(team_ids))
+    db.execute(stale_rows)
+
+    query = season_stats_query(league_id, season, team_ids)
+    db.execute(
+        insert(TeamSeasonStats).from_select([
+            'season', 'league_id', 'team_id', 'played', 'wins', 'draws',
+            'losses', 'goals_for', 'goals_against', 'points', 'last_updated'
+        ], query))
+
+
+def get_season_stats(db: Session, league_id: int, season: int):
+    """Return the precomputed stats for a league and season keyed by team id"""
+    rows = db.query(TeamSeasonStats).filter_by(league_id=league_id,
+                                               season=season).all()
+    return {row.team_id: row for row in rows}
@@ -0,0 +1,98 @@
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select
+
+from .database import SessionLocal, engine
+from .models import SyncLock
+from .upsert import dialect_insert
+
+# A lock row older than this is treated as abandoned by a crashed session
+SYNC_LOCK_TTL = timedelta(minutes=10)
+
+
+@contextmanager
+def _advisory_lock(league_id: int, season: int):
+    """Hold a Postgres session-level advisory lock on its own connection"""
+    with engine.connect() as conn:
+        acquired = conn.execute(
+            select(func.pg_try_advisory_lock(league_id, season))).scalar()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                conn.execute(
+                    select(func.pg_advisory_unlock(league_id, season)))
+            conn.commit()
+
+
+@contextmanager
+def _table_lock(league_id: int, season: int, ttl: timedelta):
+    """Hold a row in sync_locks, taking it over if it has expired"""
+    owner = uuid.uuid4().hex
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        stmt = dialect_insert(db, SyncLock).values(league_api_id=league_id,
+                                                   season=season,
+                                                   owner=owner,
+                                                   expires_at=now + ttl)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['league_api_id', 'season'],
+            set_={
+                'owner': stmt.excluded.owner,
+                'expires_at': stmt.excluded.expires_at
+            },
+            where=SyncLock.expires_at < now).returning(SyncLock.owner)
+        acquired = db.execute(stmt).scalar() == owner
+        db.commit()
+
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                db.execute(
+                    delete(SyncLock).where(SyncLock.league_api_id == league_id,
+                                           SyncLock.season == season,
+                                           SyncLock.owner == owner))
+                db.commit()
+    finally:
+        db.close()
+
+
+@contextmanager
+def sync_lock(league_id: int, season: int, ttl: timedelta = SYNC_LOCK_TTL):
+    """
+    Try to take the sync lock for a league and season without blocking.
+    Yields True when this caller holds the lock and should run the sync.
+
+    Uses a Postgres advisory lock, which is released automatically if the
+    process dies, and falls back to a lock table with a TTL elsewhere.
+    """
+    if engine.dialect.name == 'postgresql':
+        lock = _advisory_lock(league_id, season)
+    else:
+        lock = _table_lock(league_id, season, ttl)
+
+    with lock as acquired:
+        yield acquired
+
+
+def wait_for_sync_lock(league_id: int,
+                       season: int,
+                       timeout: float = 120,
+                       poll_interval: float = 1):
+    """
+    Wait until nobody holds the sync lock for a league and season.
+    Returns False if the lock is still held after timeout seconds.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        with sync_lock(league_id, season) as acquired:
+            if acquired:
+                return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(poll_interval)
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+
+from .models import League, Match, SyncState
+from .upsert import dialect_insert
+
+# Statuses of matches that will not be played or change any more
+SETTLED_STATUSES = ('FT', 'AET', 'PEN', 'AWD', 'WO', 'CANC')
+# Matches without a new date yet, or abandoned, suspended or interrupted
+# ones waiting to be replayed, picked up by the regular refresh
+POSTPONED_STATUSES = ('PST', 'TBD', 'ABD', 'SUSP', 'INT')
+# Incremental syncs never refetch fixtures further back than this, so older
+# unsettled ones can no longer change and are left out of the sync state
+INCREMENTAL_MAX_LOOKBACK_DAYS = 30
+# How long after its last match a fully settled season is frozen. Fixtures
+# such as playoffs are often published after the regular season ends.
+FREEZE_AFTER = timedelta(days=14)
+
+
+def get_sync_state(db: Session, league_id: int, season: int):
+    """Return the sync state of a league and season by primary key"""
+    return db.get(SyncState, (league_id, season))
+
+
+def update_sync_state(db: Session,
+                      league_id: int,
+                      season: int,
+                      content_hash: str = None,
+                      data_changed: bool = True):
+    """
+    Record a sync of a league and season.
+
+    Works out the next kickoff and whether the season is finished from the
+    stored matches in one aggregate. Only matches the incremental sync can
+    still refetch count, so a fixture stuck in an old state cannot keep the
+    season on the matchday cadence. A season is frozen once all of those
+    are settled and the last match was played more than FREEZE_AFTER ago.
+
+    Bumps data_version when data_changed, so caches of the season are only
+    invalidated when the sync wrote new data. Call it in the transaction
+    that writes that data, so the version can never be committed apart
+    from the rows it describes. The caller is responsible for committing.
+    """
+    now = datetime.utcnow()
+    refetchable = Match.date >= (
+        now - timedelta(days=INCREMENTAL_MAX_LOOKBACK_DAYS)).date()
+    unsettled = Match.status.notin_(SETTLED_STATUSES) & refetchable
+    upcoming = unsettled & Match.status.notin_(POSTPONED_STATUSES)
+    next_kickoff, last_match, unsettled_count, match_count = db.execute(
+        select(func.min(case((upcoming, Match.date))),
+               func.max(Match.date),
+               func.count(case((unsettled, 1))),
+               func.count(Match.id)).join(League).where(
+                   League.api_id == league_id,
+                   Match.season == season)).one()
+    frozen = (match_count > 0 and unsettled_count == 0
+              and last_match < (now - FREEZE_AFTER).date())
+
+    stmt = dialect_insert(db, SyncState).values(
+        league_api_id=league_id,
+        season=season,
+        last_synced=now,
+        next_kickoff=next_kickoff,
+        content_hash=content_hash,
+        frozen=frozen,
+        data_version=1 if data_changed else 0)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=['league_api_id', 'season'],
+            set_={
+                'last_synced': stmt.excluded.last_synced,
+                'next_kickoff': stmt.excluded.next_kickoff,
+                'content_hash': stmt.excluded.content_hash,
+                'frozen': stmt.excluded.frozen,
+                # Tells readers that cached copies of the data are stale
+                'data_version': (SyncState.data_version + 1 if data_changed
+                                 else SyncState.data_version),
+            }))
+
+
+def touch_sync_state(db: Session, league_id: int, season: int):
+    """Record that a league and season was checked and nothing had changed"""
+    db.execute(
+        update(SyncState).where(SyncState.league_api_id == league_id,
+                                SyncState.season == season).values(
+                                    last_synced=datetime.utcnow()))
+
+
+def get_data_version(db: Session, league_id: int, season: int) -> int:
+    """Return the data version of a league and season, 0 if never synced"""
+    return db.query(SyncState.data_version).filter_by(
+        league_api_id=league_id, season=season).scalar() or 0
@@ -0,0 +1,41 @@
+from sqlalchemy import or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+_DIALECT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def dialect_insert(db: Session, model):
+    """Return an INSERT for the session's dialect that supports ON CONFLICT"""
+    dialect = db.get_bind().dialect.name
+    if dialect not in _DIALECT_INSERTS:
+        raise ValueError(f"Upserts are not supported on {dialect}")
+    return _DIALECT_INSERTS[dialect](model)
+
+
+def upsert_statement(db: Session,
+                     model,
+                     index_elements,
+                     update_columns,
+                     only_changed: bool = True):
+    """
+    Build an INSERT ... ON CONFLICT DO UPDATE for the given model.
+
+    With only_changed, rows that conflict on index_elements only get written
+    when one of update_columns actually differs, so RETURNING yields just the
+    rows that were inserted or changed. Without it every row is returned.
+    """
+    stmt = dialect_insert(db, model)
+    table = model.__table__
+    where = None
+    if only_changed:
+        where = or_(*(table.c[column].is_distinct_from(stmt.excluded[column])
+                      for column in update_columns))
+    return stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={column: stmt.excluded[column]
+              for column in update_columns},
+        where=where)
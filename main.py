@@ -1,9 +1,9 @@
 import streamlit as st
-import pandas as pd
-from utils.api import get_available_leagues, get_available_seasons, get_team_data_with_matches
-from components.graph import plot_cumulative_points
+from utils.api import get_available_leagues, get_available_seasons, get_team_data_with_matches, team_data_cache_stats
+from components.graph import payload_size, plot_cumulative_points
+from utils.data_processor import filter_points_progression, get_points_progression
 from db.database import init_db
-from utils.dev_mode import log_error
+from utils.dev_mode import log_error, is_dev_mode
 from components.league_table import display_league_table
 from components.head_to_head import display_head_to_head
 
@@ -224,7 +224,7 @@ def main():
                                            format_func=lambda x: leagues[x],
                                            key="league_selector")
 
-    seasons = get_available_seasons()
+    seasons = get_available_seasons(int(selected_league))
     selected_season = st.sidebar.selectbox("Select Season",
                                            options=list(seasons.keys()),
                                            format_func=lambda x: seasons[x],
@@ -235,6 +235,13 @@ def main():
         team_data = get_team_data_with_matches(int(selected_league),
                                                int(selected_season))
 
+        if is_dev_mode():
+            cache_stats = team_data_cache_stats()
+            st.sidebar.caption(
+                f"Team data cache: {cache_stats['hits']} hits, "
+                f"{cache_stats['misses']} misses, "
+                f"{cache_stats['size']}/{cache_stats['maxsize']} entries")
+
         # Get all team names for filtering and sort alphabetically
         all_teams = sorted([team['name'] for team in team_data])
 
@@ -246,50 +253,37 @@ def main():
                                             default=all_teams,
                                             key="team_filter")
 
+        # WebGL rendering is used automatically for very large charts
+        fast_chart = st.sidebar.checkbox(
+            "Fast chart rendering",
+            help="Draw the chart with WebGL and simplified lines")
+
         # Filter team data based on selection
         filtered_team_data = [
             team for team in team_data if team['name'] in selected_teams
         ]
 
-        points_data = []
-        for team in filtered_team_data:
-            points_data.append({
-                'team':
-                team['name'],
-                'date':
-                team['matches'][0]['date'] if team['matches'] else None,
-                'points':
-                -team['points_deduction'],
-                'matches_played':
-                0,
-                'goals_for':
-                0,
-                'goals_against':
-                0,
-                'goal_difference':
-                0
-            })
-
-            for match in team['matches']:
-                points_data.append({
-                    'team': team['name'],
-                    'date': match['date'],
-                    'points': match['cumulative_total'],
-                    'matches_played': match['gameweek'],
-                    'goals_for': team['goals_for'],
-                    'goals_against': team['goals_against'],
-                    'goal_difference': team['goal_difference']
-                })
-
-        points_df = pd.DataFrame(points_data)
+        # Built once per league and season, then filtered by the selection
+        points_df = filter_points_progression(
+            get_points_progression(int(selected_league), int(selected_season),
+                                   team_data), selected_teams)
 
         tab1, tab2, tab3 = st.tabs(
             ["📈 Points Progression", "📊 League Table", "🤝 Head-to-Head"])
 
         with tab1:
-            fig = plot_cumulative_points(points_df)
+            data_version = team_data[0]['data_version'] if team_data else 0
+            fig = plot_cumulative_points(
+                points_df,
+                cache_key=(int(selected_league), int(selected_season),
+                           data_version, tuple(sorted(selected_teams))),
+                high_volume=True if fast_chart else None)
             st.plotly_chart(fig, use_container_width=True, theme="streamlit")
 
+            if is_dev_mode():
+                mode = "WebGL" if fig.data and fig.data[0].type == "scattergl" else "SVG"
+                st.caption(f"Chart payload: {payload_size(fig) / 1024:.1f} KB ({mode})")
+
             with st.expander("🎮 How to use this graph"):
                 st.markdown("""
                 - **Hover** over lines to see exact points
@@ -0,0 +1,39 @@
+"""Add indexes for the hot match queries
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16 12:00:00
+
+Tables are created by init_db(), so this only adds the indexes that
+create_all() does not add to tables that already exist.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_matches_league_season_status_date',
+                    'matches', ['league_id', 'season', 'status', 'date'],
+                    if_not_exists=True)
+    op.create_index('ix_matches_finished',
+                    'matches', ['league_id', 'season', 'date'],
+                    postgresql_where=sa.text("status = 'FT'"),
+                    sqlite_where=sa.text("status = 'FT'"),
+                    if_not_exists=True)
+    op.create_index('ix_matches_home_away',
+                    'matches', ['home_team_id', 'away_team_id'],
+                    if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_matches_home_away', table_name='matches', if_exists=True)
+    op.drop_index('ix_matches_finished', table_name='matches', if_exists=True)
+    op.drop_index('ix_matches_league_season_status_date',
+                  table_name='matches',
+                  if_exists=True)
@@ -0,0 +1,38 @@
+"""Add a data version to sync_state
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 18:00:00
+
+Databases created after this change get the column from init_db(), so it
+is only added when missing.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def _has_data_version():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('sync_state'):
+        return True
+    return any(column['name'] == 'data_version'
+               for column in inspector.get_columns('sync_state'))
+
+
+def upgrade():
+    if not _has_data_version():
+        op.add_column(
+            'sync_state',
+            sa.Column('data_version', sa.Integer(), nullable=False,
+                      server_default='0'))
+
+
+def downgrade():
+    if _has_data_version():
+        op.drop_column('sync_state', 'data_version')
@@ -0,0 +1,41 @@
+"""Drop the unique constraint on a season's home and away teams
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 09:00:00
+
+Matches are keyed on api_id. Leagues such as the Premiership and MLS play
+the same home fixture more than once a season, which the old constraint
+rejected. Batch mode rebuilds the table on SQLite, where constraints
+cannot be dropped in place.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def _has_match_teams_constraint():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('matches'):
+        return False
+    return any(constraint['name'] == 'uix_match_teams'
+               for constraint in inspector.get_unique_constraints('matches'))
+
+
+def upgrade():
+    if _has_match_teams_constraint():
+        with op.batch_alter_table('matches') as batch_op:
+            batch_op.drop_constraint('uix_match_teams', type_='unique')
+
+
+def downgrade():
+    if not _has_match_teams_constraint():
+        with op.batch_alter_table('matches') as batch_op:
+            batch_op.create_unique_constraint(
+                'uix_match_teams',
+                ['season', 'league_id', 'home_team_id', 'away_team_id'])
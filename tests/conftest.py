@@ -0,0 +1,214 @@
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+# db.database builds its engine from DATABASE_URL on import, so point it at
+# a scratch SQLite database before any application module is imported
+_scratch_dir = tempfile.mkdtemp(prefix="football-dashboard-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_scratch_dir, 'test.db')}"
+os.environ["FOOTBALL_API_CACHE_DIR"] = os.path.join(_scratch_dir, "api-cache")
+os.environ.setdefault("RAPIDAPI_KEY", "test-key")
+
+from db.database import SessionLocal, engine, session_factory  # noqa: E402
+from db.models import Base, League, Match, Team  # noqa: E402
+from utils.football_api import ApiPayload  # noqa: E402
+from utils.response_cache import ResponseCache  # noqa: E402
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_scratch_dir, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def database():
+    """Give every test empty tables"""
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    SessionLocal.remove()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def db(database):
+    # Separate from the scoped session that application code opens and closes
+    session = session_factory()
+    yield session
+    session.close()
+
+
+def seed_season(db, league_api_id=39, season=2023, team_count=12,
+                start=date(2023, 8, 12), finished_rounds=None):
+    """
+    Store a double round-robin season and return the league's database id.
+    Matches in the first finished_rounds rounds are 'FT', later ones 'NS'
+    (default: all finished).
+    """
+    league = db.query(League).filter_by(api_id=league_api_id).first()
+    if league is None:
+        league = League(api_id=league_api_id, name=f"League {league_api_id}")
+        db.add(league)
+        db.flush()
+
+    teams = []
+    for number in range(team_count):
+        api_id = league_api_id * 1000 + number
+        team = db.query(Team).filter_by(api_id=api_id).first()
+        if team is None:
+            team = Team(api_id=api_id, name=f"Team {api_id}")
+            db.add(team)
+        teams.append(team)
+    db.flush()
+
+    rounds = 2 * (team_count - 1)
+    if finished_rounds is None:
+        finished_rounds = rounds
+    match_api_id = db.query(Match).count() + season * 100000
+    for round_number in range(rounds):
+        # Every pair meets once in each half of the season
+        offset = round_number % (team_count - 1) + 1
+        second_half = round_number >= team_count - 1
+        for home_index in range(team_count):
+            away_index = (home_index + offset) % team_count
+            if (home_index > away_index) != second_half:
+                continue
+            finished = round_number < finished_rounds
+            match_api_id += 1
+            db.add(Match(api_id=match_api_id,
+                         date=start + timedelta(days=7 * round_number),
+                         season=season,
+                         league_id=league.id,
+                         home_team_id=teams[home_index].id,
+                         away_team_id=teams[away_index].id,
+                         home_score=(home_index + round_number) % 4 if finished else None,
+                         away_score=(away_index + round_number) % 3 if finished else None,
+                         status='FT' if finished else 'NS'))
+    db.commit()
+    return league.id
+
+
+def api_fixture(fixture_id, day, home, away, home_score=None, away_score=None,
+                status='NS', league_name='Test League'):
+    """
+    Build a fixture the way the football API returns it. home and away are
+    (api_id, name) pairs.
+    """
+    return {
+        'fixture': {'id': fixture_id, 'date': f"{day.isoformat()}T15:00:00+00:00",
+                    'status': {'short': status}},
+        'league': {'name': league_name},
+        'teams': {'home': {'id': home[0], 'name': home[1]},
+                  'away': {'id': away[0], 'name': away[1]}},
+        'goals': {'home': home_score, 'away': away_score},
+    }
+
+
+def payload_factory(directory):
+    """
+    Return a function that stores fixtures in a response cache under
+    directory and returns them as an ApiPayload
+    """
+    cache = ResponseCache(directory)
+    counter = itertools.count()
+
+    def make(fixtures, params=None):
+        params = params or {}
+        body = json.dumps({'results': len(fixtures), 'response': fixtures})
+        key = cache.make_key("fixtures", {**params, 'n': next(counter)})
+        content_hash = cache.store(key, [body.encode("utf-8")])
+        return ApiPayload(cache, key, params, content_hash)
+
+    return make
+
+
+@pytest.fixture
+def make_payload(tmp_path):
+    """Store fixtures in a response cache and return them as an ApiPayload"""
+    return payload_factory(str(tmp_path / "responses"))
+
+
+class FakeApi:
+    """
+    Local stand-in for the football API. Serves the body registered for an
+    endpoint with an ETag, answers 304 to a matching If-None-Match, and
+    sleeps latency seconds before every response.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.bodies = {}
+        self.failures = {}
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def respond(self, endpoint, body, fail_first=0):
+        """Serve body for endpoint, after fail_first 429 responses"""
+        self.bodies[endpoint] = json.dumps(body).encode("utf-8")
+        self.failures[endpoint] = fail_first
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                endpoint = url.path.rsplit("/", 1)[-1]
+                with api._lock:
+                    api.requests.append((endpoint, dict(parse_qsl(url.query)),
+                                         dict(self.headers)))
+                    api.in_flight += 1
+                    api.max_in_flight = max(api.max_in_flight, api.in_flight)
+                    failing = api.failures.get(endpoint, 0) > 0
+                    if failing:
+                        api.failures[endpoint] -= 1
+                try:
+                    time.sleep(api.latency)
+                    body = api.bodies.get(endpoint)
+                    if failing or body is None:
+                        self.send_response(429 if failing else 404)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                    if self.headers.get("If-None-Match") == etag:
+                        self.send_response(304)
+                        self.send_header("ETag", etag)
+                        self.end_headers()
+                        return
+                    self.send_response(200)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with api._lock:
+                        api.in_flight -= 1
+
+        return Handler
+
+
+@pytest.fixture
+def fake_api():
+    api = FakeApi()
+    thread = threading.Thread(target=api.server.serve_forever, daemon=True)
+    thread.start()
+    yield api
+    api.server.shutdown()
+    api.server.server_close()
@@ -0,0 +1,39 @@
+from datetime import date
+
+import pandas as pd
+
+import backfill as backfill_module
+from backfill import backfill, load_checkpoint
+from conftest import api_fixture
+from db.models import Standings
+
+HOME = (501, 'Home FC')
+AWAY = (502, 'Away FC')
+
+
+def test_season_without_standings_is_left_for_the_next_run(
+        db, make_payload, tmp_path, monkeypatch):
+    fixtures = [api_fixture(1, date(2023, 8, 5), HOME, AWAY, 1, 0, 'FT')]
+    standings = pd.DataFrame([{
+        'team_name': name, 'team_id': api_id, 'position': position,
+        'points': points, 'matches_played': 1, 'goals_for': 0,
+        'goals_against': 0, 'goal_difference': 0, 'form': None
+    } for position, ((api_id, name), points) in enumerate(
+        ((HOME, 3), (AWAY, 0)), start=1)])
+    responses = iter([pd.DataFrame(), standings])
+    monkeypatch.setattr(
+        backfill_module, "fetch_many", lambda pairs, max_concurrency: {
+            pair: {'fixtures': make_payload(fixtures),
+                   'standings': next(responses)} for pair in pairs})
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+
+    # The standings request came back empty, so the season is not done
+    assert backfill([39], [2023], checkpoint_path=checkpoint_path) == 1
+    assert load_checkpoint(checkpoint_path)["39:2023"]["status"] == "partial"
+    assert db.query(Standings).count() == 0
+
+    # The next run picks it up again and completes it
+    assert backfill([39], [2023], checkpoint_path=checkpoint_path) == 1
+    assert load_checkpoint(checkpoint_path)["39:2023"]["status"] == "done"
+    assert db.query(Standings).count() == 2
+    assert backfill([39], [2023], checkpoint_path=checkpoint_path) == 0
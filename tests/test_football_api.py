@@ -0,0 +1,40 @@
+from datetime import date
+
+from conftest import api_fixture
+from utils.football_api import FootballApiClient, iter_fixtures
+from utils.response_cache import ResponseCache
+
+FIXTURES = {'results': 1, 'response': [
+    api_fixture(1, date(2023, 8, 5), (1, 'Home'), (2, 'Away'), 2, 0, 'FT')
+]}
+
+
+def client_for(fake_api, tmp_path):
+    return FootballApiClient(api_key="test",
+                             base_url=fake_api.url,
+                             backoff_factor=0,
+                             cache=ResponseCache(str(tmp_path)))
+
+
+def test_unchanged_response_is_served_from_the_cache(fake_api, tmp_path):
+    fake_api.respond("fixtures", FIXTURES)
+    client = client_for(fake_api, tmp_path)
+    params = {"league": 39, "season": 2023}
+
+    first = client.get_payload("fixtures", params)
+    second = client.get_payload("fixtures", params)
+
+    assert second.content_hash == first.content_hash
+    assert [record.fixture_id for record in iter_fixtures(second)] == [1]
+    # The second request was conditional and came back without a body
+    _, _, headers = fake_api.requests[-1]
+    assert headers["If-None-Match"]
+    assert headers["X-RapidAPI-Key"] == "test"
+
+
+def test_rate_limited_requests_are_retried(fake_api, tmp_path):
+    fake_api.respond("standings", {'response': []}, fail_first=2)
+    payload = client_for(fake_api, tmp_path).get_payload("standings")
+
+    assert payload.json() == {'response': []}
+    assert len(fake_api.requests) == 3
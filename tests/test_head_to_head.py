@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy import event
+
+from conftest import seed_season
+from db.head_to_head import get_head_to_head, missing_pairs, pair_key, refresh_head_to_head
+from db.models import HeadToHead, Team
+from utils.api import get_head_to_head_summary
+
+
+def match_queries(engine, action):
+    """Run action and return the statements it sent that read matches"""
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        if "FROM matches" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        action()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return statements
+
+
+def test_pair_that_never_met_is_a_stored_empty_summary(database, db):
+    strangers = (Team(api_id=1, name='One'), Team(api_id=2, name='Two'))
+    db.add_all(strangers)
+    db.commit()
+    key = pair_key(strangers[1].id, strangers[0].id)
+
+    refresh_head_to_head(db, [key])
+    db.commit()
+    assert db.get(HeadToHead, key).played == 0
+
+    # Later lookups are a primary key hit and never scan matches again
+    lookups = match_queries(database, lambda: get_head_to_head(db, *key))
+    assert lookups == []
+
+
+def test_read_only_app_does_not_build_missing_pairs(db, monkeypatch):
+    seed_season(db, 39, 2023, team_count=4)
+    first, second = db.query(Team).order_by(Team.id).limit(2).all()
+    monkeypatch.setenv("FOOTBALL_DASHBOARD_SYNC", "worker")
+
+    team1 = {'id': first.id, 'name': first.name}
+    team2 = {'id': second.id, 'name': second.name}
+    assert get_head_to_head_summary(team1, team2)['played'] == 0
+    assert db.query(HeadToHead).count() == 0
+
+    # The worker fills in every pair that has played
+    assert len(missing_pairs(db)) == 6
+    refresh_head_to_head(db, missing_pairs(db))
+    db.commit()
+    assert missing_pairs(db) == set()
+    assert get_head_to_head_summary(team1, team2)['played'] == 2
+
+
+def test_team_compared_with_itself_gets_an_empty_record(db):
+    seed_season(db, 39, 2023, team_count=4)
+    team = db.query(Team).order_by(Team.id).first()
+
+    summary = get_head_to_head_summary({'id': team.id, 'name': team.name},
+                                       {'id': team.id, 'name': team.name})
+    assert summary['played'] == 0
+    assert summary['matches'] == []
+    assert db.query(HeadToHead).count() == 0
+
+    # Self pairs are never stored, even when asked for
+    assert get_head_to_head(db, team.id, team.id) is None
+    refresh_head_to_head(db, [(team.id, team.id)])
+    db.commit()
+    assert db.query(HeadToHead).count() == 0
+    with pytest.raises(ValueError):
+        pair_key(team.id, team.id)
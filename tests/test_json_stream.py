@@ -0,0 +1,51 @@
+import io
+import json
+
+import pytest
+
+from utils.json_stream import iter_json_array
+
+DOCUMENT = {
+    'get': 'fixtures',
+    'paging': {'current': 1, 'total': 1},
+    'ratio': 1.5,
+    'offset': -12,
+    'large': 2.5e-3,
+    'exponent': 1E+6,
+    'flags': [True, False, None],
+    'response': [
+        {'id': 1, 'odds': 2.75, 'goals': {'home': 0, 'away': None}},
+        10,
+        -0.5,
+        6.02e23,
+        'text with , and ] inside',
+        [1, [2.25, -3e-2]],
+        {},
+        [],
+    ],
+}
+
+
+@pytest.mark.parametrize('indent', [None, 1])
+def test_matches_json_loads_at_every_chunk_size(indent):
+    text = json.dumps(DOCUMENT, indent=indent)
+    for chunk_size in range(1, len(text) + 1):
+        header = {}
+        items = list(iter_json_array(io.StringIO(text), 'response',
+                                     header=header, chunk_size=chunk_size))
+        assert items == DOCUMENT['response'], chunk_size
+        assert header == {key: value for key, value in DOCUMENT.items()
+                          if key != 'response'}, chunk_size
+
+
+def test_number_split_at_the_decimal_point():
+    stream = io.StringIO('{"a": 1.5, "response": [1]}')
+    header = {}
+    assert list(iter_json_array(stream, 'response', header=header,
+                                chunk_size=2)) == [1]
+    assert header == {'a': 1.5}
+
+
+def test_missing_key():
+    with pytest.raises(KeyError):
+        list(iter_json_array(io.StringIO('{"results": 0}'), 'response'))
@@ -0,0 +1,37 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from components.league_table import cached_sparkline, table_row
+
+COLOURS = {'primary': '#ff0000', 'secondary': '#0000ff'}
+
+
+def team(season, totals, data_version=1, **fields):
+    """A team dict as built by load_team_data, for one league season"""
+    return {
+        'id': 7,
+        'league_id': 39,
+        'season': season,
+        'data_version': data_version,
+        'matches': SimpleNamespace(cumulative_totals=np.array(totals)),
+        **fields,
+    }
+
+
+def test_sparklines_are_cached_per_league_season():
+    # data_version counts per league season, so both seasons are at 1
+    first = cached_sparkline(team(2022, [3, 6, 9]), COLOURS, max_points=30)
+    second = cached_sparkline(team(2023, [0, 1, 1]), COLOURS, max_points=30)
+    assert first != second
+    assert cached_sparkline(team(2022, [3, 6, 9]), COLOURS, max_points=30) == first
+
+
+def test_rows_are_cached_per_league_season():
+    stats = dict(position=1, name='Team 7', matches_played=38, wins=16,
+                 draws=5, losses=17, goal_difference=4, goals_for=50,
+                 goals_against=46, form='WWDLW')
+    first = table_row(team(2022, [3, 6], total_points=53, **stats), COLOURS, 60)
+    second = table_row(team(2023, [0, 3], total_points=40, **stats), COLOURS, 60)
+    assert '>53<' in first
+    assert '>40<' in second
@@ -0,0 +1,72 @@
+import time
+from datetime import date
+
+import pytest
+
+import utils.football_api as football_api
+from conftest import api_fixture
+from db.models import Match, Standings
+from utils.data_sync import sync_matches
+from utils.multi_fetch import fetch_many
+from utils.response_cache import ResponseCache
+
+HOME, AWAY = (1, 'Home'), (2, 'Away')
+FIXTURES = {'results': 1, 'response': [
+    api_fixture(10, date(2023, 8, 5), HOME, AWAY, 2, 0, 'FT')
+]}
+STANDINGS = {'response': [{'league': {'standings': [[{
+    'team': {'id': api_id, 'name': name},
+    'rank': rank,
+    'points': points,
+    'all': {'played': 1, 'goals': {'for': goals_for, 'against': 2 - goals_for}},
+    'goalsDiff': 2 * goals_for - 2,
+    'form': form
+} for rank, ((api_id, name), points, goals_for, form) in enumerate(
+    ((HOME, 3, 2, 'W'), (AWAY, 0, 0, 'L')), start=1)]]}}]}
+
+PAIRS = [(39, 2023), (40, 2023), (140, 2023), (61, 2023)]
+
+
+@pytest.fixture
+def api(fake_api, tmp_path, monkeypatch):
+    """Point the process-wide API client at the fake API"""
+    fake_api.respond("fixtures", FIXTURES)
+    fake_api.respond("standings", STANDINGS)
+    client = football_api.FootballApiClient(api_key="test",
+                                            base_url=fake_api.url,
+                                            cache=ResponseCache(str(tmp_path)))
+    monkeypatch.setattr(football_api, "_api_client", client)
+    yield fake_api
+    client.close()
+
+
+def test_pairs_are_fetched_concurrently_under_the_cap(api):
+    api.latency = 0.3
+    started = time.monotonic()
+    results = fetch_many(PAIRS, max_concurrency=4, requests_per_minute=6000)
+    elapsed = time.monotonic() - started
+
+    assert set(results) == set(PAIRS)
+    assert len(api.requests) == 2 * len(PAIRS)
+    assert 1 < api.max_in_flight <= 4
+    # Eight sequential requests would take 2.4s
+    assert elapsed < 4 * api.latency
+
+
+def test_token_bucket_keeps_to_the_rate(api):
+    # Bursts of two, then one request every 0.1s
+    started = time.monotonic()
+    fetch_many(PAIRS + [(78, 2023), (135, 2023)], max_concurrency=2,
+               requests_per_minute=600)
+    assert time.monotonic() - started >= 0.9
+    assert api.max_in_flight <= 2
+
+
+def test_fetched_data_feeds_the_sync(api, db):
+    payload = fetch_many([(39, 2023)])[(39, 2023)]
+    sync_matches(39, 2023, full_sync=True,
+                 fixtures_payload=payload['fixtures'],
+                 standings_df=payload['standings'])
+
+    assert db.query(Match).one().api_id == 10
+    assert sorted(points for points, in db.query(Standings.points)) == [0, 3]
@@ -0,0 +1,122 @@
+"""
+Check that the hot match queries are answered from an index. The queries
+are captured as the application sends them, bound parameters included, and
+run through EXPLAIN QUERY PLAN on the seeded SQLite database.
+"""
+import re
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from conftest import seed_season
+from db.head_to_head import refresh_head_to_head
+from db.models import Team
+from db.season_stats import refresh_season_stats
+from utils.api import get_league_matches, load_team_data
+from utils.data_sync import get_incremental_window
+
+# Plan steps that read the whole matches table or a whole index of it
+FULL_SCAN = re.compile(r"\bSCAN (TABLE )?matches\b")
+
+
+@pytest.fixture
+def seeded(db):
+    """Three league seasons, one of them half played"""
+    seed_season(db, 39, 2022)
+    league_id = seed_season(db, 39, 2023, finished_rounds=11)
+    seed_season(db, 40, 2023)
+    return league_id
+
+
+@contextmanager
+def captured_match_queries(engine):
+    """Collect the (statement, parameters) of every query that reads matches"""
+    queries = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if re.search(r"\bFROM matches\b", statement):
+            queries.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def query_plan(engine, statement, parameters):
+    """Return the detail column of EXPLAIN QUERY PLAN for a statement"""
+    conn = engine.raw_connection()
+    try:
+        rows = conn.cursor().execute("EXPLAIN QUERY PLAN " + statement,
+                                     parameters).fetchall()
+    finally:
+        conn.close()
+    return [row[-1] for row in rows]
+
+
+def assert_indexed(engine, queries):
+    assert queries, "no query on matches was captured"
+    for statement, parameters in queries:
+        plan = query_plan(engine, statement, parameters)
+        scans = [step for step in plan if FULL_SCAN.search(step)]
+        assert not scans, f"{statement}\nfalls back to a scan: {plan}"
+        assert any("matches USING" in step for step in plan), plan
+
+
+def test_team_data_uses_an_index(database, seeded):
+    with captured_match_queries(database) as queries:
+        load_team_data(39, 2023)
+    assert_indexed(database, queries)
+
+
+def test_incremental_window_uses_an_index(database, db, seeded):
+    with captured_match_queries(database) as queries:
+        assert get_incremental_window(db, 39, 2023) is not None
+    assert_indexed(database, queries)
+
+
+def test_season_stats_use_an_index(database, db, seeded):
+    with captured_match_queries(database) as queries:
+        refresh_season_stats(db, seeded, 2023)
+    db.rollback()
+    assert_indexed(database, queries)
+
+
+def test_head_to_head_uses_an_index(database, db, seeded):
+    team_ids = [team_id for team_id, in db.query(Team.id).limit(4)]
+    with captured_match_queries(database) as queries:
+        refresh_head_to_head(db, [team_ids[:2], team_ids[2:]])
+    db.rollback()
+    assert_indexed(database, queries)
+
+
+def test_league_matches_use_an_index(database, seeded, monkeypatch):
+    monkeypatch.setenv("FOOTBALL_DASHBOARD_SYNC", "worker")
+    with captured_match_queries(database) as queries:
+        get_league_matches.clear()
+        assert not get_league_matches(39, [2022, 2023]).empty
+    assert_indexed(database, queries)
+
+
+def test_finished_index_accepts_a_bound_status(database, seeded):
+    """
+    status = 'FT' is sent as a bound parameter, and SQLite only uses the
+    partial index when it can match the bound value to the index's WHERE
+    clause. Without the composite index the finished matches query must
+    still be served from ix_matches_finished.
+    """
+    with database.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_matches_league_season_status_date")
+
+    with captured_match_queries(database) as queries:
+        load_team_data(39, 2023)
+    finished = [(statement, parameters) for statement, parameters in queries
+                if "'FT'" not in statement and 'FT' in parameters]
+    assert finished, "no finished matches query with a bound status"
+
+    for statement, parameters in finished:
+        plan = query_plan(database, statement, parameters)
+        assert any("USING INDEX ix_matches_finished" in step
+                   for step in plan), f"{statement}\n{plan}"
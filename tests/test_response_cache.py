@@ -0,0 +1,39 @@
+import os
+
+from utils.response_cache import ResponseCache
+
+
+def bodies(directory):
+    return [name for name in os.listdir(directory)
+            if name.endswith(ResponseCache.BODY_SUFFIX)]
+
+
+def test_processes_sharing_a_cache_keep_each_others_entries(tmp_path):
+    # The app, the worker and the backfill each hold their own instance
+    app = ResponseCache(str(tmp_path), max_bytes=3000)
+    worker = ResponseCache(str(tmp_path), max_bytes=3000)
+    for number in range(3):
+        app.store(f"app-{number}", [b"a" * 1000])
+        worker.store(f"worker-{number}", [b"w" * 1000])
+
+    on_disk = bodies(tmp_path)
+    assert sum(os.path.getsize(tmp_path / name) for name in on_disk) <= 3000
+
+    fresh = ResponseCache(str(tmp_path), max_bytes=3000)
+    for name in on_disk:
+        key = name[:-len(ResponseCache.BODY_SUFFIX)]
+        assert fresh.get(key)["size"] == 1000
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=2000)
+    cache.store("first", [b"1" * 1000], etag='"v1"')
+    cache.store("second", [b"2" * 1000])
+    os.utime(cache.meta_path("first"), (1, 1))
+    os.utime(cache.meta_path("second"), (2, 2))
+    cache.touch("first")
+
+    cache.store("third", [b"3" * 1000])
+    assert cache.get("second") is None
+    assert cache.get("first")["etag"] == '"v1"'
+    assert cache.get("third") is not None
@@ -0,0 +1,132 @@
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+import utils.data_sync as data_sync
+from conftest import api_fixture
+from db.models import HeadToHead, Match, Standings, Team, TeamSeasonStats
+from db.sync_state import get_data_version
+from utils.data_sync import sync_matches
+
+HOME = (501, 'Home FC')
+AWAY = (502, 'Away FC')
+OTHER = (503, 'Other FC')
+
+
+def sync(payload, full_sync=True):
+    # An empty standings frame keeps the sync away from the API
+    return sync_matches(39, 2023, full_sync=full_sync,
+                        fixtures_payload=payload, standings_df=pd.DataFrame())
+
+
+def test_repeated_home_fixture_is_stored(db, make_payload):
+    """Leagues such as the Premiership host the same opponent twice a season"""
+    start = date(2023, 8, 5)
+    fixtures = [
+        api_fixture(1, start, HOME, AWAY, 2, 1, 'FT'),
+        api_fixture(2, start + timedelta(days=7), AWAY, OTHER, 0, 0, 'FT'),
+        api_fixture(3, start + timedelta(days=90), HOME, AWAY, 1, 3, 'FT'),
+        api_fixture(4, start + timedelta(days=180), HOME, AWAY),
+    ]
+
+    assert sync(make_payload(fixtures)) == 4
+    stored = db.query(Match.api_id).order_by(Match.api_id).all()
+    assert [api_id for api_id, in stored] == [1, 2, 3, 4]
+
+    # A second full sync updates the repeated fixtures in place
+    fixtures[3] = api_fixture(4, start + timedelta(days=180), HOME, AWAY, 2, 2, 'FT')
+    assert sync(make_payload(fixtures)) == 4
+    db.expire_all()
+    assert db.query(Match).count() == 4
+    assert db.query(Match).filter_by(api_id=4).one().status == 'FT'
+
+
+def standings(points):
+    return pd.DataFrame([{
+        'team_name': name, 'team_id': api_id, 'position': position,
+        'points': team_points, 'matches_played': 1, 'goals_for': 0,
+        'goals_against': 0, 'goal_difference': 0, 'form': None
+    } for position, ((api_id, name), team_points) in enumerate(
+        zip((HOME, AWAY), points), start=1)])
+
+
+def test_data_version_only_moves_when_data_changes(db, make_payload):
+    kickoff = date(2023, 8, 5)
+    fixtures = [api_fixture(1, kickoff, HOME, AWAY, 1, 0, 'FT')]
+
+    def sync_with(fixtures, standings_df=pd.DataFrame()):
+        sync_matches(39, 2023, fixtures_payload=make_payload(fixtures),
+                     standings_df=standings_df)
+        return get_data_version(db, 39, 2023)
+
+    assert sync_with(fixtures) == 1
+
+    # A new payload that writes nothing new, e.g. a moved kickoff time
+    moved = api_fixture(1, kickoff, HOME, AWAY, 1, 0, 'FT')
+    moved['fixture']['date'] = f"{kickoff.isoformat()}T17:30:00+00:00"
+    assert sync_with([moved]) == 1
+
+    # Changed standings or a changed score bump the version
+    assert sync_with(fixtures, standings((3, 0))) == 2
+    assert sync_with(fixtures, standings((3, 0))) == 2
+    assert sync_with([api_fixture(1, kickoff, HOME, AWAY, 1, 1, 'FT')]) == 3
+
+
+def test_failed_stats_refresh_leaves_nothing_for_the_retry_to_miss(
+        db, make_payload, monkeypatch):
+    kickoff = date(2023, 8, 5)
+    payload = make_payload([api_fixture(1, kickoff, HOME, AWAY, 2, 0, 'FT')])
+    real_refresh = data_sync.refresh_season_stats
+
+    def failing_refresh(*args, **kwargs):
+        raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(data_sync, "refresh_season_stats", failing_refresh)
+    with pytest.raises(Exception):
+        sync(payload)
+    assert db.query(Match).count() == 0
+
+    # The retry still sees the match as changed and builds its stats
+    monkeypatch.setattr(data_sync, "refresh_season_stats", real_refresh)
+    sync(payload)
+    points = dict(db.query(Team.api_id, TeamSeasonStats.points).join(
+        TeamSeasonStats, TeamSeasonStats.team_id == Team.id))
+    assert points == {HOME[0]: 3, AWAY[0]: 0}
+    assert db.query(HeadToHead).one().played == 1
+
+
+def test_failed_standings_keep_the_match_write(db, make_payload):
+    broken_standings = standings((3, 0)).drop(columns=['form'])
+    sync_matches(39, 2023, full_sync=True,
+                 fixtures_payload=make_payload([
+                     api_fixture(1, date(2023, 8, 5), HOME, AWAY, 2, 0, 'FT')
+                 ]),
+                 standings_df=broken_standings)
+
+    assert db.query(Match).count() == 1
+    assert db.query(Standings).count() == 0
+    assert get_data_version(db, 39, 2023) == 1
+
+
+def test_data_version_moves_on_the_retry_of_a_failed_sync(
+        db, make_payload, monkeypatch):
+    kickoff = date(2023, 8, 5)
+    sync(make_payload([api_fixture(1, kickoff, HOME, AWAY, 0, 0, '1H')]))
+    assert get_data_version(db, 39, 2023) == 1
+
+    final = make_payload([api_fixture(1, kickoff, HOME, AWAY, 1, 0, 'FT')])
+    real_standings = data_sync.sync_standings
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("worker killed")
+
+    monkeypatch.setattr(data_sync, "sync_standings", crash)
+    with pytest.raises(Exception):
+        sync(final)
+    monkeypatch.setattr(data_sync, "sync_standings", real_standings)
+
+    sync(final)
+    db.expire_all()
+    assert db.query(Match).one().status == 'FT'
+    assert get_data_version(db, 39, 2023) == 2
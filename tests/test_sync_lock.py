@@ -0,0 +1,64 @@
+import threading
+import time
+from datetime import date
+
+import pandas as pd
+
+import utils.data_sync as data_sync
+from conftest import api_fixture
+from db.models import Match, SyncLock
+from db.sync_lock import sync_lock
+
+THREADS = 16
+
+
+def test_only_one_thread_syncs_a_league_season(db, make_payload, monkeypatch):
+    payload = make_payload([
+        api_fixture(1, date(2023, 8, 5), (1, 'Home'), (2, 'Away'), 1, 0, 'FT')
+    ])
+    real_sync = data_sync.sync_matches
+    runs = []
+
+    def slow_sync(*args, **kwargs):
+        runs.append(threading.get_ident())
+        time.sleep(0.5)  # Keep the lock held while the others arrive
+        return real_sync(*args, **kwargs)
+
+    monkeypatch.setattr(data_sync, "sync_matches", slow_sync)
+
+    barrier = threading.Barrier(THREADS)
+    results = []
+    errors = []
+
+    def open_league():
+        try:
+            barrier.wait()
+            results.append(data_sync.sync_matches_locked(
+                39, 2023, fixtures_payload=payload,
+                standings_df=pd.DataFrame()))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=open_league) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(runs) == 1
+    assert sorted(results) == [False] * (THREADS - 1) + [True]
+    # The losers waited for the data instead of returning empty handed
+    assert db.query(Match).count() == 1
+    assert db.query(SyncLock).count() == 0
+
+
+def test_expired_lock_can_be_taken_over(db):
+    db.add(SyncLock(league_api_id=39, season=2023, owner='crashed',
+                    expires_at=pd.Timestamp('2000-01-01').to_pydatetime()))
+    db.commit()
+
+    with sync_lock(39, 2023) as acquired:
+        assert acquired
+        with sync_lock(39, 2023) as again:
+            assert not again
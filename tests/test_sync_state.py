@@ -0,0 +1,85 @@
+from datetime import date, datetime, timedelta
+
+from conftest import seed_season
+from db.models import Match, SyncState
+from db.sync_state import FREEZE_AFTER, get_sync_state, update_sync_state
+from utils.data_sync import (FROZEN_RECHECK_INTERVAL, INCREMENTAL_LOOKBACK_DAYS,
+                             get_incremental_window, needs_refresh)
+
+
+def test_season_freezes_only_after_its_last_match_is_well_past(db):
+    # Every match settled, the last one three days ago: playoff fixtures
+    # may still be published
+    assert FREEZE_AFTER > timedelta(days=3)
+    recent_start = date.today() - timedelta(days=7 * 21 + 3)
+    seed_season(db, 253, 2023, team_count=12, start=recent_start)
+    update_sync_state(db, 253, 2023)
+    db.commit()
+    assert not get_sync_state(db, 253, 2023).frozen
+
+    seed_season(db, 39, 2022, start=date(2022, 8, 6))
+    update_sync_state(db, 39, 2022)
+    db.commit()
+    assert get_sync_state(db, 39, 2022).frozen
+
+
+def test_frozen_season_is_rechecked_weekly(db):
+    db.add(SyncState(league_api_id=39, season=2022, frozen=True,
+                     last_synced=datetime.utcnow() - timedelta(days=1)))
+    db.commit()
+    assert not needs_refresh(39, 2022)
+
+    db.query(SyncState).update({
+        SyncState.last_synced:
+        datetime.utcnow() - FROZEN_RECHECK_INTERVAL - timedelta(minutes=1)
+    })
+    db.commit()
+    assert needs_refresh(39, 2022)
+
+
+def test_cancelled_fixture_does_not_hold_the_incremental_window_open(db):
+    league_id = seed_season(db, 39, 2023, team_count=4,
+                            start=date.today() - timedelta(weeks=5))
+    cancelled = db.query(Match).filter_by(league_id=league_id).order_by(
+        Match.date).first()
+    cancelled.status = 'CANC'
+    db.commit()
+
+    from_date, _ = get_incremental_window(db, 39, 2023)
+    assert from_date == date.today() - timedelta(days=INCREMENTAL_LOOKBACK_DAYS)
+
+
+def test_stale_abandoned_fixture_does_not_pin_the_season(db):
+    league_id = seed_season(db, 179, 2023, team_count=4,
+                            start=date.today() - timedelta(weeks=12))
+    abandoned = db.query(Match).filter_by(league_id=league_id).order_by(
+        Match.date).first()
+    abandoned.status = 'ABD'
+    abandoned.home_score = abandoned.away_score = None
+    db.commit()
+
+    update_sync_state(db, 179, 2023)
+    db.commit()
+    state = get_sync_state(db, 179, 2023)
+    assert state.next_kickoff is None
+    assert state.frozen
+
+    # The matchday cadence does not apply to it
+    state.last_synced = datetime.utcnow() - timedelta(hours=1)
+    db.commit()
+    assert not needs_refresh(179, 2023)
+
+
+def test_recent_abandoned_fixture_waits_for_the_regular_refresh(db):
+    league_id = seed_season(db, 179, 2023, team_count=4,
+                            start=date.today() - timedelta(weeks=5, days=2))
+    abandoned = db.query(Match).filter_by(league_id=league_id).order_by(
+        Match.date.desc()).first()
+    abandoned.status = 'ABD'
+    db.commit()
+
+    update_sync_state(db, 179, 2023)
+    db.commit()
+    state = get_sync_state(db, 179, 2023)
+    assert state.next_kickoff is None
+    assert not state.frozen
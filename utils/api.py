@@ -1,20 +1,64 @@
+import os
+from datetime import date
 import pandas as pd
 import streamlit as st
+from sqlalchemy.orm import aliased
 from db.database import get_db
-from db.models import League, Match, Team, Standings
-from utils.data_sync import sync_matches, needs_refresh
+from db.models import League, Match, Team, Standings, TeamSeasonStats
+from db.head_to_head import get_head_to_head
+from db.sync_state import get_data_version
+from utils.data_sync import sync_matches_locked, needs_refresh, inline_sync_enabled
 from utils.dev_mode import is_dev_mode
+from utils.lru_cache import LRUCache
+from utils.points_engine import team_match_results
+from utils.season_data import SeasonData
+
+# Assembled team data shared by every session in the process, keyed by
+# (league_id, season, data_version)
+TEAM_DATA_CACHE = LRUCache(
+    maxsize=int(os.getenv("FOOTBALL_DASHBOARD_TEAM_DATA_CACHE_SIZE", "16")))
 
 
 def get_team_data_with_matches(league_id: int, season: int):
     """
     Get team data including matches in an efficient structure.
     Returns a list of team objects with their matches and standings data.
+
+    The result is cached until a sync writes new data for the league and
+    season, and is shared between sessions, so treat it as read-only.
     """
-    # Check if data needs refresh
-    if needs_refresh(league_id, season):
-        sync_matches(league_id, season)
+    # Check if data needs refresh, unless the sync worker keeps it fresh.
+    # Only one session syncs a league and season at a time.
+    if inline_sync_enabled() and needs_refresh(league_id, season):
+        sync_matches_locked(league_id, season)
+
+    db = next(get_db())
+    try:
+        data_version = get_data_version(db, league_id, season)
+    finally:
+        db.close()
+
+    key = (league_id, season, data_version)
+    team_data = TEAM_DATA_CACHE.get(key)
+    if team_data is None:
+        team_data = load_team_data(league_id, season, data_version)
+        # Older versions of this league and season will never be read again
+        TEAM_DATA_CACHE.discard(lambda cached: cached[:2] == key[:2])
+        TEAM_DATA_CACHE.put(key, team_data)
+    return team_data
+
 
+def team_data_cache_stats():
+    """Return hit/miss counters and the size of the team data cache"""
+    return TEAM_DATA_CACHE.stats()
+
+
+def load_team_data(league_id: int, season: int, data_version: int = 0):
+    """
+    Build the team data for a league and season from the database. Each team
+    carries league_id, season and data_version so renderers can cache their
+    output per league season and version.
+    """
     db = next(get_db())
     try:
         # Get league from database
@@ -23,55 +67,45 @@ def get_team_data_with_matches(league_id: int, season: int):
             return []
 
         # Get all teams with their standings for this league and season
-        teams_with_standings = (db.query(Team, Standings).join(
-            Standings, Team.id == Standings.team_id).filter(
-                Standings.league_id == league.id,
-                Standings.season == season).all())
+        teams_with_standings = (db.query(Team, Standings, TeamSeasonStats).join(
+            Standings, Team.id == Standings.team_id).outerjoin(
+                TeamSeasonStats, (TeamSeasonStats.team_id == Team.id) &
+                (TeamSeasonStats.league_id == Standings.league_id) &
+                (TeamSeasonStats.season == Standings.season)).filter(
+                    Standings.league_id == league.id,
+                    Standings.season == season).all())
+
+        # Get all finished matches for the league and season in one query
+        # and score them for every team in one vectorized pass
+        matches = (db.query(Match.date, Match.home_team_id,
+                            Match.away_team_id, Match.home_score,
+                            Match.away_score).filter(
+                                Match.league_id == league.id,
+                                Match.season == season,
+                                Match.status == 'FT').order_by(
+                                    Match.date, Match.id).all())
+        matches_df = pd.DataFrame(matches,
+                                  columns=[
+                                      'date', 'home_team', 'away_team',
+                                      'home_score', 'away_score'
+                                  ])
+        results = team_match_results(matches_df)
+
+        # Hold every team's matches in compact arrays, one view per team
+        season_data = SeasonData.from_results(
+            results, [team.id for team, _, _ in teams_with_standings],
+            [standing.points_deduction for _, standing, _ in teams_with_standings])
 
         team_data = []
-        for team, standing in teams_with_standings:
-            # Get all matches for this team
-            matches = (db.query(Match).filter(
-                Match.league_id == league.id, Match.season == season,
-                Match.status == 'FT',
-                ((Match.home_team_id == team.id) |
-                 (Match.away_team_id == team.id))).order_by(Match.date).all())
-
-            # Process matches into required format
-            processed_matches = []
-            cumulative_points = 0
-
-            for match in matches:
-                is_home = match.home_team_id == team.id
-                opponent_id = match.away_team_id if is_home else match.home_team_id
-                team_score = match.home_score if is_home else match.away_score
-                opp_score = match.away_score if is_home else match.home_score
-
-                # Calculate result and points
-                if team_score > opp_score:
-                    result = 'win'
-                    cumulative_points += 3
-                elif team_score == opp_score:
-                    result = 'draw'
-                    cumulative_points += 1
-                else:
-                    result = 'loss'
-
-                # Apply points deduction to cumulative total
-                adjusted_points = cumulative_points - standing.points_deduction
-
-                processed_matches.append({
-                    'date': match.date,
-                    'gameweek': len(processed_matches) + 1,
-                    'result': result,
-                    'side': 'home' if is_home else 'away',
-                    'opponent': opponent_id,
-                    'goals': {
-                        'home': match.home_score,
-                        'away': match.away_score
-                    },
-                    'cumulative_total': adjusted_points
-                })
+        for index, (team, standing, stats) in enumerate(teams_with_standings):
+            matches = season_data.team_matches(index)
+
+            # W/D/L come from the precomputed season stats when available
+            if stats:
+                wins, draws, losses = stats.wins, stats.draws, stats.losses
+            else:
+                wins, draws, losses = (int((matches.points == points).sum())
+                                       for points in (3, 1, 0))
 
             # Create team object with standings and matches data
             team_data.append({
@@ -84,9 +118,15 @@ def get_team_data_with_matches(league_id: int, season: int):
                 'goals_for': standing.goals_for,
                 'goals_against': standing.goals_against,
                 'goal_difference': standing.goal_difference,
+                'wins': wins,
+                'draws': draws,
+                'losses': losses,
                 'points_deduction': standing.points_deduction,
                 'form': standing.form,
-                'matches': processed_matches
+                'league_id': league_id,
+                'season': season,
+                'data_version': data_version,
+                'matches': matches
             })
 
         return team_data
@@ -98,81 +138,152 @@ def get_team_data_with_matches(league_id: int, season: int):
 @st.cache_data(ttl=3600)  # Cache for 1 hour by default
 def get_league_matches(league_id, season):
     """
-    Get match data for a specific league and season.
-    Now uses the new team_data structure but returns dataframe for compatibility.
+    Get finished matches for a league and a season, or a list of seasons,
+    as a dataframe read straight from the database with typed columns.
     """
-    team_data = get_team_data_with_matches(league_id, season)
-
-    # Convert team_data into matches dataframe for backward compatibility
-    matches_data = []
-    for team in team_data:
-        for match in team['matches']:
-            if match[
-                    'side'] == 'home':  # Only add matches where team is home to avoid duplicates
-                matches_data.append({
-                    'date':
-                    match['date'],
-                    'home_team':
-                    team['name'],
-                    'away_team':
-                    next(t['name'] for t in team_data
-                         if t['id'] == match['opponent']),
-                    'home_score':
-                    match['goals']['home'],
-                    'away_score':
-                    match['goals']['away']
-                })
-
-    return pd.DataFrame(matches_data)
+    seasons = ([int(season)] if isinstance(season, (int, str))
+               else [int(s) for s in season])
+    if inline_sync_enabled():
+        for season in seasons:
+            if needs_refresh(league_id, season):
+                sync_matches_locked(league_id, season)
+
+    home_team = aliased(Team)
+    away_team = aliased(Team)
+    db = next(get_db())
+    try:
+        matches = (db.query(Match.season, Match.date, home_team.name,
+                            away_team.name, Match.home_score,
+                            Match.away_score).join(
+                                League, Match.league_id == League.id).join(
+                                    home_team,
+                                    Match.home_team_id == home_team.id).join(
+                                        away_team,
+                                        Match.away_team_id == away_team.id).
+                   filter(League.api_id == league_id,
+                          Match.season.in_(seasons),
+                          Match.status == 'FT').order_by(Match.date,
+                                                         Match.id).all())
+    finally:
+        db.close()
+
+    matches_df = pd.DataFrame(matches,
+                              columns=[
+                                  'season', 'date', 'home_team', 'away_team',
+                                  'home_score', 'away_score'
+                              ])
+
+    # Home and away names share one set of categories so they compare
+    team_names = pd.CategoricalDtype(
+        sorted(set(matches_df['home_team']) | set(matches_df['away_team'])))
+    return matches_df.assign(
+        date=pd.to_datetime(matches_df['date'])).astype({
+            'season': 'int16',
+            'home_team': team_names,
+            'away_team': team_names,
+            'home_score': 'int8',
+            'away_score': 'int8'
+        })
+
+
+# Leagues and seasons shown in the app and refreshed by the sync worker
+AVAILABLE_LEAGUES = {
+    "39": "🏴󠁧󠁢󠁥󠁮󠁧󠁿 Premier League",
+    "40": "🏴󠁧󠁢󠁥󠁮󠁧󠁿 Championship",
+    "140": "🇪🇸 La Liga",
+    "61": "🇫🇷 Ligue 1",
+    "78": "🇩🇪 Bundesliga",
+    "135": "🇹🇯 Serie A",
+    "179": "🏴󠁧󠁢󠁳󠁣󠁴󠁿 Premiership",
+    "253": "🇺🇸 MLS"
+}
+
+AVAILABLE_SEASONS = {"2024": "24/25", "2023": "23/24", "2022": "22/23"}
 
 
 @st.cache_data(ttl=3600)
 def get_available_leagues():
     """Return available leagues for selection"""
-    return {
-        "39": "🏴󠁧󠁢󠁥󠁮󠁧󠁿 Premier League",
-        "40": "🏴󠁧󠁢󠁥󠁮󠁧󠁿 Championship",
-        "140": "🇪🇸 La Liga",
-        "61": "🇫🇷 Ligue 1",
-        "78": "🇩🇪 Bundesliga",
-        "135": "🇹🇯 Serie A",
-        "179": "🏴󠁧󠁢󠁳󠁣󠁴󠁿 Premiership",
-        "253": "🇺🇸 MLS"
-    }
+    return AVAILABLE_LEAGUES
 
 
-def get_available_seasons():
-    """Return available seasons for selection"""
-    return {"2024": "24/25", "2023": "23/24", "2022": "22/23"}
+def season_label(season: int):
+    """Format a season start year as e.g. '24/25'"""
+    return f"{season % 100:02d}/{(season + 1) % 100:02d}"
 
 
-def fetch_head_to_head_from_api(team1, team2):
-    # Get database session
+@st.cache_data(ttl=600)
+def get_available_seasons(league_id: int = None):
+    """
+    Return the seasons that have match data in the database, newest first.
+
+    The default seasons stay selectable while inline sync can load them on
+    demand, and are used as a fallback when the database holds nothing yet.
+    """
     db = next(get_db())
     try:
-        matches = (db.query(Match).filter(
-            Match.status == 'FT', ((Match.home_team_id == team1['id']) &
-                                   (Match.away_team_id == team2['id'])) |
-            ((Match.home_team_id == team2['id']) &
-             (Match.away_team_id == team1['id']))).order_by(
-                 Match.date.desc()).all())
-
-        h2h_matches = []
-        for match in matches:
-            is_team1_home = match.home_team_id == team1['id']
-            h2h_matches.append({
-                'date':
-                match.date,
-                'home_team':
-                team1['name'] if is_team1_home else team2['name'],
-                'away_team':
-                team2['name'] if is_team1_home else team1['name'],
-                'home_score':
-                match.home_score,
-                'away_score':
-                match.away_score
-            })
-
-        return h2h_matches
+        query = db.query(Match.season).distinct()
+        if league_id is not None:
+            query = query.join(League, Match.league_id == League.id).filter(
+                League.api_id == league_id)
+        seasons = {season for season, in query}
     finally:
         db.close()
+
+    if inline_sync_enabled() or not seasons:
+        seasons.update(int(season) for season in AVAILABLE_SEASONS)
+
+    return {str(season): season_label(season)
+            for season in sorted(seasons, reverse=True)}
+
+
+def get_head_to_head_summary(team1, team2):
+    """
+    Return the head-to-head record of two teams from the precomputed pair
+    summary: W/D/L and goals from team1's point of view plus the most
+    recent meetings, newest first. A team compared with itself gets the
+    empty record.
+    """
+    summary = None
+    if team1['id'] != team2['id']:
+        db = next(get_db())
+        try:
+            # The web path only writes when it is allowed to sync
+            summary = get_head_to_head(db, team1['id'], team2['id'],
+                                       build_missing=inline_sync_enabled())
+        finally:
+            db.close()
+
+    if summary is None:
+        return {
+            'played': 0,
+            'team1_wins': 0,
+            'draws': 0,
+            'team2_wins': 0,
+            'team1_goals': 0,
+            'team2_goals': 0,
+            'matches': []
+        }
+
+    team1_is_low = team1['id'] == summary.team_low_id
+    names = {team1['id']: team1['name'], team2['id']: team2['name']}
+    return {
+        'played': summary.played,
+        'team1_wins': summary.low_wins if team1_is_low else summary.high_wins,
+        'draws': summary.draws,
+        'team2_wins': summary.high_wins if team1_is_low else summary.low_wins,
+        'team1_goals': summary.low_goals if team1_is_low else summary.high_goals,
+        'team2_goals': summary.high_goals if team1_is_low else summary.low_goals,
+        'matches': [{
+            'date': date.fromisoformat(meeting['date']),
+            'home_team': names[meeting['home_team_id']],
+            'away_team': names[meeting['away_team_id']],
+            'home_score': meeting['home_score'],
+            'away_score': meeting['away_score']
+        } for meeting in summary.recent_meetings]
+    }
+
+
+def fetch_head_to_head_from_api(team1, team2):
+    """Return the most recent meetings of two teams, newest first"""
+    return get_head_to_head_summary(team1, team2)['matches']
@@ -1,6 +1,11 @@
+import numpy as np
 import pandas as pd
-from db.database import get_db
-from sqlalchemy import or_
+from utils.lru_cache import LRUCache
+from utils.points_engine import team_match_results
+
+# Points progression frames keyed by (league_id, season)
+_progression_cache = LRUCache(maxsize=16)
+
 
 def calculate_cumulative_points(matches_df):
     """
@@ -10,70 +15,99 @@ def calculate_cumulative_points(matches_df):
     if matches_df.empty:
         return pd.DataFrame()
 
-    # Get database session
-    db = next(get_db())
-
-    try:
-        points_data = []
-
-        # Get all unique teams
-        all_teams = set(matches_df['home_team'].unique()) | set(matches_df['away_team'].unique())
-
-        for team in all_teams:
-            # Get team matches in order
-            team_matches = matches_df[
-                (matches_df['home_team'] == team) | 
-                (matches_df['away_team'] == team)
-            ].sort_values('date')
-
-            # Add starting point
-            points_data.append({
-                'team': team,
-                'date': matches_df['date'].min(),
-                'points': 0,
-                'matches_played': 0,
-                'goals_for': 0,
-                'goals_against': 0,
-                'goal_difference': 0
-            })
-
-            current_points = 0
-            goals_for = 0
-            goals_against = 0
-            matches_count = 0
-
-            for _, match in team_matches.iterrows():
-                matches_count += 1
-
-                if match['home_team'] == team:
-                    match_goals_for = match['home_score']
-                    match_goals_against = match['away_score']
-                else:
-                    match_goals_for = match['away_score']
-                    match_goals_against = match['home_score']
-
-                goals_for += match_goals_for
-                goals_against += match_goals_against
-
-                if match_goals_for > match_goals_against:
-                    current_points += 3
-                elif match_goals_for == match_goals_against:
-                    current_points += 1
-
-                points_data.append({
-                    'team': team,
-                    'date': match['date'],
-                    'points': current_points,
-                    'matches_played': matches_count,
-                    'goals_for': goals_for,
-                    'goals_against': goals_against,
-                    'goal_difference': goals_for - goals_against
-                })
-
-        return pd.DataFrame(points_data)
-
-    finally:
-        db.close()
+    results = team_match_results(matches_df)
+
+    progression = pd.DataFrame({
+        'team': results['team'],
+        'date': results['date'],
+        'points': results['cumulative_points'],
+        'matches_played': results['gameweek'],
+        'goals_for': results['cumulative_goals_for'],
+        'goals_against': results['cumulative_goals_against'],
+        'goal_difference': (results['cumulative_goals_for'] -
+                            results['cumulative_goals_against'])
+    })
+
+    # Add a starting point for every team
+    teams = results['team'].unique()
+    starting_points = pd.DataFrame({
+        'team': teams,
+        'date': matches_df['date'].min(),
+        'points': 0,
+        'matches_played': 0,
+        'goals_for': 0,
+        'goals_against': 0,
+        'goal_difference': 0
+    })
+
+    return pd.concat([starting_points, progression],
+                     ignore_index=True).sort_values(
+                         ['team', 'matches_played'],
+                         kind='stable',
+                         ignore_index=True)
+
+def build_points_progression(team_data):
+    """
+    Build the points progression frame used by the graph straight from the
+    match arrays in team_data: a starting row per team with its points
+    deduction, then one row per match with the cumulative total.
+    """
+    if not team_data:
+        return pd.DataFrame(columns=[
+            'team', 'date', 'points', 'matches_played', 'goals_for',
+            'goals_against', 'goal_difference'
+        ])
+
+    matches = [team['matches'] for team in team_data]
+    lengths = np.array([len(team_matches) for team_matches in matches])
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+    def team_column(field):
+        return np.array([team[field] for team in team_data])
+
+    def with_starting_rows(match_values, starting_values):
+        return np.insert(match_values, starts, starting_values)
+
+    dates = np.concatenate([team_matches.dates for team_matches in matches])
+    first_dates = np.array([
+        team_matches.dates[0] if len(team_matches) else np.datetime64('NaT')
+        for team_matches in matches
+    ], dtype='datetime64[D]')
+
+    progression = {
+        'team': np.repeat(team_column('name'), lengths + 1),
+        'date': with_starting_rows(dates, first_dates),
+        'points': with_starting_rows(
+            np.concatenate([m.cumulative_totals for m in matches]).astype(int),
+            -team_column('points_deduction')),
+        'matches_played': with_starting_rows(
+            np.concatenate([m.gameweeks for m in matches]).astype(int), 0),
+    }
+    # Match rows carry the team's season totals, starting rows zeros
+    for field in ('goals_for', 'goals_against', 'goal_difference'):
+        progression[field] = with_starting_rows(
+            np.repeat(team_column(field), lengths), 0)
+
+    return pd.DataFrame(progression)
+
+
+def get_points_progression(league_id, season, team_data):
+    """
+    Return the points progression frame for a league and season, rebuilt
+    only when team_data is a new object, i.e. after a sync wrote new data.
+    """
+    key = (league_id, season)
+    cached = _progression_cache.get(key)
+    if cached is None or cached[0] is not team_data:
+        cached = (team_data, build_points_progression(team_data))
+        _progression_cache.put(key, cached)
+    return cached[1]
+
+
+def filter_points_progression(points_df, teams):
+    """Select the rows of the given teams with a boolean mask"""
+    return points_df[points_df['team'].isin(teams)]
+
 
 def get_team_colors():
     """Return consistent primary and secondary colors for teams across all leagues"""
@@ -1,160 +1,222 @@
+import os
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from itertools import islice
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from db.models import League, Team, Match, Standings
 from db.database import get_db
-from utils.football_api import fetch_matches_from_api, fetch_standings_from_api
+from db.head_to_head import refresh_head_to_head
+from db.season_stats import get_season_stats, refresh_season_stats
+from db.sync_lock import sync_lock, wait_for_sync_lock
+from db.sync_state import (INCREMENTAL_MAX_LOOKBACK_DAYS, SETTLED_STATUSES, get_sync_state,
+                           touch_sync_state, update_sync_state)
+from db.upsert import upsert_statement
+from utils.football_api import fetch_fixtures_from_api, fetch_standings_from_api, iter_fixtures
 from utils.dev_mode import log_error, is_dev_mode
-import streamlit as st
+from utils.progress import ProgressReporter
 
-def sync_matches(league_id: int, season: int):
+# Date window used for incremental syncs
+INCREMENTAL_LOOKBACK_DAYS = 3
+INCREMENTAL_LOOKAHEAD_DAYS = 7
+
+# Fixtures written per INSERT ... ON CONFLICT statement
+UPSERT_BATCH_SIZE = 500
+
+# How often to refresh around matches, and at the latest otherwise
+MATCHDAY_REFRESH_INTERVAL = timedelta(minutes=15)
+STALE_AFTER = timedelta(hours=24)
+# Finished seasons are still checked now and then for late fixtures
+FROZEN_RECHECK_INTERVAL = timedelta(days=7)
+
+
+def season_has_matches(db: Session, league_id: int, season: int) -> bool:
+    """Check if any matches are stored for a league and season"""
+    return db.query(Match.id).join(League).filter(
+        League.api_id == league_id,
+        Match.season == season).first() is not None
+
+
+def season_has_standings(db: Session, league_id: int, season: int) -> bool:
+    """Check if any standings are stored for a league and season"""
+    return db.query(Standings.id).join(League).filter(
+        League.api_id == league_id,
+        Standings.season == season).first() is not None
+
+
+def get_incremental_window(db: Session, league_id: int, season: int):
+    """
+    Return the (from, to) date window to fetch for an incremental sync, or
+    None when the season has never been synced and needs a full pull.
+
+    The window starts at the oldest past fixture that is not settled yet
+    (capped at INCREMENTAL_MAX_LOOKBACK_DAYS) and runs a few days ahead so
+    fixtures that are live, just finished or rescheduled are picked up.
+    """
+    if not season_has_matches(db, league_id, season):
+        return None
+
+    league = db.query(League).filter_by(api_id=league_id).first()
+    today = datetime.now().date()
+    oldest_unfinished = (db.query(Match.date).filter(
+        Match.league_id == league.id, Match.season == season,
+        Match.date < today, Match.status.notin_(SETTLED_STATUSES)).order_by(
+            Match.date).limit(1).scalar())
+
+    from_date = today - timedelta(days=INCREMENTAL_LOOKBACK_DAYS)
+    if oldest_unfinished:
+        from_date = min(from_date, oldest_unfinished)
+    from_date = max(from_date,
+                    today - timedelta(days=INCREMENTAL_MAX_LOOKBACK_DAYS))
+
+    return from_date, today + timedelta(days=INCREMENTAL_LOOKAHEAD_DAYS)
+
+
+def fetch_season_fixtures(league_id: int, season: int, window=None):
+    """
+    Fetch the fixtures payload of a season, or only the fixtures in a
+    (from, to) window. Returns None if the request failed.
+    """
+    if window:
+        from_date, to_date = window
+        print(f"Incremental sync from {from_date} to {to_date}")
+        return fetch_fixtures_from_api(league_id,
+                                       season,
+                                       from_date=from_date,
+                                       to_date=to_date)
+    return fetch_fixtures_from_api(league_id, season)
+
+
+def sync_matches(league_id: int,
+                 season: int,
+                 full_sync: bool = False,
+                 fixtures_payload=None,
+                 standings_df: pd.DataFrame = None):
     """
     Sync matches for a specific league and season with progress tracking.
+
+    Seasons that are already in the database only fetch fixtures in the
+    incremental window unless full_sync is set, and a payload identical to
+    the last one written is skipped. Pass fixtures_payload and standings_df
+    to sync data that was already fetched, e.g. by utils.multi_fetch.
+    Returns the number of fixtures processed.
     """
     season = int(season)
     db = next(get_db())
 
     try:
-        # Fetch matches from API
-        api_matches = fetch_matches_from_api(league_id, season)
-        if api_matches.empty:
-            return
+        # Fetch fixtures from API unless they were fetched already
+        if fixtures_payload is None:
+            window = None if full_sync else get_incremental_window(
+                db, league_id, season)
+            fixtures_payload = fetch_season_fixtures(league_id, season, window)
+        if fixtures_payload is None:
+            return 0
+
+        # Nothing to write if the payload is the same as the last one synced
+        state = get_sync_state(db, league_id, season)
+        if (not full_sync and state is not None
+                and state.content_hash == fixtures_payload.content_hash):
+            print("Fixtures unchanged since the last sync")
+            touch_sync_state(db, league_id, season)
+            db.commit()
+            return 0
 
         print(f"\nStarting sync for league {league_id}, season {season}")
-        print(f"Retrieved {len(api_matches)} matches from API")
 
-        # Show progress bar
-        progress_text = "Loading match data..."
-        total_matches = len(api_matches)
-        progress_bar = st.progress(0, text=progress_text)
+        # Show progress, throttled so the UI is not flooded with updates
+        progress = ProgressReporter("Loading match data...")
 
-        # Get or create league
         league = db.query(League).filter_by(api_id=league_id).first()
-        if not league:
-            league = League(api_id=league_id,
-                          name=api_matches['league_name'].iloc[0])
-            db.add(league)
-            db.commit()
 
-        # Get all unique teams from the API data
-        unique_teams = pd.concat([
-            api_matches[['home_team', 'home_team_id']].rename(
-                columns={'home_team': 'name', 'home_team_id': 'api_id'}),
-            api_matches[['away_team', 'away_team_id']].rename(
-                columns={'away_team': 'name', 'away_team_id': 'api_id'})
-        ]).drop_duplicates(subset=['api_id'])
+        # Insert new fixtures and update changed ones keyed on api_id. Only
+        # rows that were written come back from RETURNING.
+        upsert = upsert_statement(
+            db, Match, ['api_id'],
+            ['date', 'home_score', 'away_score', 'status']).returning(
+                Match.home_team_id, Match.away_team_id)
 
-        # Process all teams at once
-        all_api_ids = unique_teams['api_id'].tolist()
-        existing_teams = {
-            t.api_id: t
-            for t in db.query(Team).filter(Team.api_id.in_(all_api_ids)).all()
-        }
-
-        # Create any missing teams
-        new_teams = []
-        for _, team_data in unique_teams.iterrows():
-            if team_data['api_id'] not in existing_teams:
-                try:
-                    team = Team(
-                        api_id=team_data['api_id'],
-                        name=team_data['name']
-                    )
-                    db.add(team)
-                    db.commit()
-                    existing_teams[team_data['api_id']] = team
-                except Exception as e:
-                    db.rollback()
-                    print(f"Error creating team {team_data['name']}: {str(e)}")
-                    continue
-
-        # Pre-fetch existing matches
-        existing_matches = {
-            (m.season, m.league_id, m.home_team_id, m.away_team_id): m
-            for m in db.query(Match).filter_by(season=season,
-                                             league_id=league.id).all()
-        }
-
-        print(f"Found {len(existing_matches)} existing matches in database")
-        new_matches_count = 0
-        updated_matches_count = 0
+        header = {}
+        team_ids = {}
         processed_matches = 0
-
-        # Process matches in batches
-        batch_size = 50
-        total_batches = (len(api_matches) + batch_size - 1) // batch_size
-
-        for batch_idx in range(total_batches):
-            start_idx = batch_idx * batch_size
-            end_idx = min(start_idx + batch_size, len(api_matches))
-            batch = api_matches.iloc[start_idx:end_idx]
-
-            print(f"Processing batch {batch_idx + 1}/{total_batches} (matches {start_idx + 1}-{end_idx})")
-            new_matches = []
-
-            for _, row in batch.iterrows():
-                try:
-                    processed_matches += 1
-                    progress = processed_matches / total_matches
-                    progress_bar.progress(
-                        progress,
-                        text=f"{progress_text} ({processed_matches}/{total_matches})"
-                    )
-
-                    home_team = existing_teams[row['home_team_id']]
-                    away_team = existing_teams[row['away_team_id']]
-                    match_key = (season, league.id, home_team.id, away_team.id)
-                    match = existing_matches.get(match_key)
-
-                    home_score = int(row['home_score']) if pd.notna(
-                        row['home_score']) else None
-                    away_score = int(row['away_score']) if pd.notna(
-                        row['away_score']) else None
-
-                    if match:
-                        if match.home_score != home_score or match.away_score != away_score:
-                            match.home_score = home_score
-                            match.away_score = away_score
-                            match.status = row['status']
-                            updated_matches_count += 1
-                    else:
-                        new_match = Match(
-                            api_id=row['fixture_id'],
-                            date=pd.to_datetime(row['date']).date(),
-                            season=season,
-                            league_id=league.id,
-                            home_team_id=home_team.id,
-                            away_team_id=away_team.id,
-                            home_score=home_score,
-                            away_score=away_score,
-                            status=row['status']
-                        )
-                        new_matches.append(new_match)
-                        existing_matches[match_key] = new_match
-                        new_matches_count += 1
-
-                except Exception as e:
-                    print(f"Error processing match {row['fixture_id']}: {str(e)}")
-                    continue
-
-            if new_matches:
-                db.bulk_save_objects(new_matches)
+        changed_matches_count = 0
+        changed_team_ids = set()
+        changed_pairs = set()
+
+        # Parse fixtures straight off the payload and write them in batches
+        fixtures = iter_fixtures(fixtures_payload, header)
+        while batch := list(islice(fixtures, UPSERT_BATCH_SIZE)):
+            # Get or create league
+            if not league:
+                league = League(api_id=league_id, name=batch[0].league_name)
+                db.add(league)
+                db.flush()
+
+            # Create any teams we have not seen yet and get their ids
+            new_teams = {}
+            for fixture in batch:
+                for api_id, name in ((fixture.home_team_id, fixture.home_team),
+                                     (fixture.away_team_id, fixture.away_team)):
+                    if api_id not in team_ids:
+                        new_teams[api_id] = name
+            team_ids.update(upsert_teams(db, new_teams.items()))
+
+            match_rows = [{
+                'api_id': fixture.fixture_id,
+                'date': date.fromisoformat(fixture.date),
+                'season': season,
+                'league_id': league.id,
+                'home_team_id': team_ids[fixture.home_team_id],
+                'away_team_id': team_ids[fixture.away_team_id],
+                'home_score': fixture.home_score,
+                'away_score': fixture.away_score,
+                'status': fixture.status
+            } for fixture in batch]
+
+            changed_matches = db.execute(upsert.values(match_rows)).all()
+            changed_matches_count += len(changed_matches)
+            for home_team_id, away_team_id in changed_matches:
+                changed_team_ids.update((home_team_id, away_team_id))
+                changed_pairs.add((home_team_id, away_team_id))
+
+            processed_matches += len(batch)
+            total_matches = max(header.get('results') or 0, processed_matches)
+            progress.update(processed_matches, total_matches)
+
+        # Everything below is written in the same transaction as the matches.
+        # The changed teams and pairs only exist in this upsert's RETURNING
+        # rows, so a failure must leave the matches unwritten for the retry.
+        if not processed_matches:
+            # An empty date window, e.g. during an international break
+            update_sync_state(db, league_id, season,
+                              fixtures_payload.content_hash,
+                              data_changed=False)
             db.commit()
-
-            print(f"Batch {batch_idx + 1} complete: {len(new_matches)} new, {updated_matches_count} updated")
+            progress.close()
+            return 0
 
         print(f"\nSync complete:")
-        print(f"- Processed {processed_matches}/{total_matches} matches")
-        print(f"- {new_matches_count} new matches added")
-        print(f"- {updated_matches_count} existing matches updated")
-        print(f"- {len(existing_matches)} total matches in database")
+        print(f"- Processed {processed_matches} matches")
+        print(f"- {changed_matches_count} matches inserted or updated")
+
+        # Refresh the precomputed season stats and head-to-head summaries
+        # for teams whose matches changed
+        refresh_season_stats(db, league.id, season, changed_team_ids)
+        refresh_head_to_head(db, changed_pairs)
 
         # Sync standings after matches are synced
-        sync_standings(db, league_id, season)
+        standings_changed = sync_standings(db, league_id, season, standings_df)
+
+        # Record the sync so the next one can skip an unchanged payload. The
+        # data version only moves when matches or standings were written.
+        update_sync_state(db, league_id, season, fixtures_payload.content_hash,
+                          data_changed=changed_matches_count > 0 or standings_changed)
+        db.commit()
 
         # Clear progress bar
-        progress_bar.empty()
+        progress.close()
+
+        return processed_matches
 
     except Exception as e:
         db.rollback()
@@ -166,18 +228,65 @@ def sync_matches(league_id: int, season: int):
     finally:
         db.close()
 
-def sync_standings(db: Session, league_id: int, season: int):
-    """Sync standings data from the API"""
+def sync_matches_locked(league_id: int,
+                        season: int,
+                        wait: bool = None,
+                        full_sync: bool = False,
+                        fixtures_payload=None,
+                        standings_df: pd.DataFrame = None) -> bool:
+    """
+    Run sync_matches unless another session or worker is already syncing
+    this league and season. Returns True if this call ran the sync.
+
+    When the sync is already running, wait for it to finish if there is no
+    data to show yet, otherwise return straight away and serve stale data.
+    Pass wait to override that.
+    """
+    season = int(season)
+    with sync_lock(league_id, season) as acquired:
+        if acquired:
+            sync_matches(league_id,
+                         season,
+                         full_sync=full_sync,
+                         fixtures_payload=fixtures_payload,
+                         standings_df=standings_df)
+            return True
+
+    print(f"League {league_id}, season {season} is already being synced")
+    if wait is None:
+        db = next(get_db())
+        try:
+            wait = not season_has_matches(db, league_id, season)
+        finally:
+            db.close()
+    if wait:
+        wait_for_sync_lock(league_id, season)
+    return False
+
+
+def sync_standings(db: Session,
+                   league_id: int,
+                   season: int,
+                   standings_df: pd.DataFrame = None) -> bool:
+    """
+    Sync standings data from the API, or from standings_df if given.
+    Returns True if any standing was inserted or changed.
+
+    The standings are written in a savepoint of the caller's transaction, so
+    a failure only discards them. The caller is responsible for committing.
+    """
+    savepoint = None
     try:
         # Fetch current standings from API
-        standings_df = fetch_standings_from_api(league_id, season)
+        if standings_df is None:
+            standings_df = fetch_standings_from_api(league_id, season)
         if standings_df.empty:
-            return
+            return False
 
         # Get league
         league = db.query(League).filter_by(api_id=league_id).first()
         if not league:
-            return
+            return False
 
         # Get existing teams dictionary
         existing_teams = {
@@ -185,147 +294,156 @@ def sync_standings(db: Session, league_id: int, season: int):
             for t in db.query(Team).all()
         }
 
+        # Expected points come from the precomputed season stats
+        season_stats = get_season_stats(db, league.id, season)
+
         # Update standings for each team
+        savepoint = db.begin_nested()
+        changed = False
         for _, row in standings_df.iterrows():
             team_id = existing_teams.get(row['team_id'])
             if not team_id:
                 continue
 
-            # Calculate points deduction by comparing total points with expected points
-            matches_played = row['matches_played']
-            points_deduction = 0
-
-            # Get all matches for this team to calculate expected points
-            team = db.query(Team).get(team_id)
-            matches = (db.query(Match).filter((Match.home_team_id == team_id) |
-                                              (Match.away_team_id == team_id),
-                                              Match.status == 'FT',
-                                              Match.season == season).all())
-
-            expected_points = 0
-            for match in matches:
-                if match.home_team_id == team_id:
-                    if match.home_score > match.away_score:
-                        expected_points += 3
-                    elif match.home_score == match.away_score:
-                        expected_points += 1
-                else:
-                    if match.away_score > match.home_score:
-                        expected_points += 3
-                    elif match.home_score == match.away_score:
-                        expected_points += 1
+            stats = season_stats.get(team_id)
+            expected_points = stats.points if stats else 0
 
             # The difference between expected and actual points is the deduction
             points_deduction = expected_points - row['points']
             if points_deduction < 0:  # If negative, assume it's a bonus not a deduction
                 points_deduction = 0
 
+            values = {
+                'position': row['position'],
+                'points': row['points'],
+                'points_deduction': points_deduction,
+                'matches_played': row['matches_played'],
+                'goals_for': row['goals_for'],
+                'goals_against': row['goals_against'],
+                'goal_difference': row['goal_difference'],
+                'form': row['form']
+            }
+
             # Get existing standing or create new one
             standing = (db.query(Standings).filter_by(season=season,
                                                       league_id=league.id,
                                                       team_id=team_id).first())
 
             if standing:
-                # Update existing standing
-                standing.position = row['position']
-                standing.points = row['points']
-                standing.points_deduction = points_deduction
-                standing.matches_played = row['matches_played']
-                standing.goals_for = row['goals_for']
-                standing.goals_against = row['goals_against']
-                standing.goal_difference = row['goal_difference']
-                standing.form = row['form']
-                standing.last_updated = datetime.utcnow()
+                # Update existing standing if anything moved
+                if any(getattr(standing, column) != value
+                       for column, value in values.items()):
+                    for column, value in values.items():
+                        setattr(standing, column, value)
+                    standing.last_updated = datetime.utcnow()
+                    changed = True
             else:
                 # Create new standing
                 standing = Standings(season=season,
                                      league_id=league.id,
                                      team_id=team_id,
-                                     position=row['position'],
-                                     points=row['points'],
-                                     points_deduction=points_deduction,
-                                     matches_played=row['matches_played'],
-                                     goals_for=row['goals_for'],
-                                     goals_against=row['goals_against'],
-                                     goal_difference=row['goal_difference'],
-                                     form=row['form'],
-                                     last_updated=datetime.utcnow())
+                                     last_updated=datetime.utcnow(),
+                                     **values)
                 db.add(standing)
+                changed = True
 
-        db.commit()
+        savepoint.commit()
+        return changed
 
     except Exception as e:
-        db.rollback()
+        if savepoint is not None and savepoint.is_active:
+            savepoint.rollback()
         error_msg = log_error("Failed to sync standings", e)
         if is_dev_mode():
             raise Exception(error_msg) from e
+        return False
+
+
+def upsert_teams(db: Session, teams):
+    """
+    Insert or rename teams from (api_id, name) pairs in one statement and
+    return a dict of api_id to database id for all of them.
+    The caller is responsible for committing.
+    """
+    rows = [{
+        'api_id': int(api_id),
+        'name': name
+    } for api_id, name in teams]
+    if not rows:
+        return {}
+
+    upsert = upsert_statement(db, Team, ['api_id'], ['name'],
+                              only_changed=False).returning(
+                                  Team.api_id, Team.id)
+    return dict(db.execute(upsert.values(rows)).all())
 
 
 def get_or_create_team(db: Session,
                        team_name: str,
                        team_api_id: int,
-                       league_id: int,
                        existing_teams: dict = None):
     """Get or create a team in the database efficiently"""
     if existing_teams is not None:
         # Check in-memory cache first
-        team = existing_teams.get((team_api_id, league_id))
+        team = existing_teams.get(team_api_id)
         if team:
             return team
 
-    # Check database if not found in cache
-    with db.no_autoflush:
-        team = db.query(Team).filter_by(api_id=team_api_id,
-                                        league_id=league_id).first()
-        if not team:
-            team = Team(name=team_name,
-                        api_id=team_api_id,
-                        league_id=league_id)
-            db.add(team)
-            db.commit()
-            if existing_teams is not None:
-                existing_teams[(team_api_id, league_id)] = team
+    team_id = upsert_teams(db, [(team_api_id, team_name)])[team_api_id]
+    db.commit()
+    team = db.get(Team, team_id)
+    if existing_teams is not None:
+        existing_teams[team_api_id] = team
     return team
 
+def inline_sync_enabled() -> bool:
+    """
+    Check if the app should sync data while rendering a page.
+    Set FOOTBALL_DASHBOARD_SYNC=worker when worker.py keeps the data fresh.
+    """
+    return os.getenv('FOOTBALL_DASHBOARD_SYNC', 'inline').lower() != 'worker'
+
+
 def needs_refresh(league_id: int, season: int) -> bool:
     """
     Check if we need to refresh data for a league and season.
     Returns True if:
-    - No data exists
-    - There are unfinished matches in the past that need updating
-    - Next match is within 24 hours
+    - The season has never been synced
+    - Next match is within 24 hours or overdue, and the last sync is older
+      than MATCHDAY_REFRESH_INTERVAL
+    - The last sync is older than STALE_AFTER
+    Finished seasons are frozen and only rechecked every
+    FROZEN_RECHECK_INTERVAL, in case fixtures were added late.
     """
     season = int(season)
     db = next(get_db())
     try:
-        league = db.query(League).filter_by(api_id=league_id).first()
-        if not league:
-            print(f"League {league_id} not found in the database")
-            return True
+        state = get_sync_state(db, league_id, season)
+    finally:
+        db.close()
 
-        # Get latest match in database
-        latest_match = (db.query(Match).filter_by(
-            league_id=league.id,
-            season=season).order_by(Match.date.desc()).first())
+    if state is None:
+        print(f"League {league_id}, season {season} has not been synced yet")
+        return True
 
-        if not latest_match:
-            print(f"No match data in league {league_id} and season {season}")
+    now = datetime.utcnow()
+    since_sync = now - state.last_synced
+    if state.frozen:
+        if since_sync >= FROZEN_RECHECK_INTERVAL:
+            print(f"Rechecking finished league {league_id}, season {season}")
             return True
+        return False
 
-        # Check for unfinished matches in the past
-        unfinished_past_matches = (db.query(Match).filter(
-            Match.league_id == league.id, Match.season == season, Match.date
-            < datetime.now().date(), Match.status != 'FT').count())
-
-        if unfinished_past_matches > 0:
-            print(
-                f"Unfinished matches in the past for league {league_id} and season {season}"
-            )
-            return True
+    matchday = (state.next_kickoff is not None
+                and state.next_kickoff <= now.date() + timedelta(days=1))
+    if matchday and since_sync >= MATCHDAY_REFRESH_INTERVAL:
+        print(f"Matches due for league {league_id} and season {season}")
+        return True
 
-        print("No data sync required")
+    if since_sync >= STALE_AFTER:
+        print(f"Data for league {league_id} and season {season} is stale")
+        return True
 
-        return False
+    print("No data sync required")
 
-    finally:
-        db.close()
\ No newline at end of file
+    return False
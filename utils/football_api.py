@@ -1,97 +1,245 @@
 import requests
 import pandas as pd
 import streamlit as st
+import json
 import os
+import threading
+from typing import NamedTuple, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from utils.json_stream import iter_json_array
+from utils.response_cache import ResponseCache
 
 FOOTBALL_API_BASE = "https://api-football-v1.p.rapidapi.com/v3"
+FOOTBALL_API_HOST = "api-football-v1.p.rapidapi.com"
 
-def fetch_matches_from_api(league_id, season):
-    """Fetch match data directly from the API"""
-    try:
-        headers = {
-            "X-RapidAPI-Key": os.getenv("RAPIDAPI_KEY"),
-            "X-RapidAPI-Host": "api-football-v1.p.rapidapi.com"
-        }
+# (connect, read) timeouts in seconds per endpoint
+DEFAULT_TIMEOUT = (5, 10)
+ENDPOINT_TIMEOUTS = {
+    "fixtures": (5, 30),
+    "standings": (5, 10),
+}
 
-        print(f"Fetching matches from API for league {league_id}, season {season}")
+# Responses worth retrying with backoff
+RETRY_STATUSES = (429, 500, 502, 503, 504)
 
-        # Get all fixtures for the league and season
-        response = requests.get(
-            f"{FOOTBALL_API_BASE}/fixtures",
-            headers=headers,
-            params={
-                "league": league_id,
-                "season": season
-            },
-            timeout=10
-        )
-
-        if response.status_code == 401:
-            st.error("⚠️ Invalid API key. Please check your RapidAPI key.")
-            return pd.DataFrame()
+# On-disk cache of response bodies
+CACHE_DIR = os.getenv("FOOTBALL_API_CACHE_DIR", ".cache/football_api")
+CACHE_MAX_BYTES = int(os.getenv("FOOTBALL_API_CACHE_MAX_MB", "200")) * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
 
-        response.raise_for_status()
-        data = response.json()
 
-        if "response" not in data:
-            st.error("⚠️ Unexpected API response format")
-            return pd.DataFrame()
+class ApiPayload:
+    """A response body held in the response cache"""
 
-        fixtures = data["response"]
-        print(f"Received {len(fixtures)} matches from API")
+    def __init__(self, cache, key, params, content_hash):
+        self.cache = cache
+        self.key = key
+        self.params = params or {}
+        self.content_hash = content_hash
 
-        if not fixtures:
-            st.warning("No matches found for the selected league and season.")
-            return pd.DataFrame()
+    def open(self):
+        """Open the body for streaming reads"""
+        return open(self.cache.body_path(self.key), encoding="utf-8")
 
-        matches = []
-        for fixture in fixtures:
-            match = {
-                'fixture_id': fixture['fixture']['id'],
-                'date': fixture['fixture']['date'][:10],
-                'home_team': fixture['teams']['home']['name'],
-                'home_team_id': fixture['teams']['home']['id'],
-                'away_team': fixture['teams']['away']['name'],
-                'away_team_id': fixture['teams']['away']['id'],
-                'home_score': fixture['goals']['home'],
-                'away_score': fixture['goals']['away'],
-                'status': fixture['fixture']['status']['short'],
-                'league_name': fixture['league']['name']
-            }
-            matches.append(match)
-
-        matches_df = pd.DataFrame(matches)
-        print(f"Processed {len(matches_df)} matches into DataFrame")
-        return matches_df
+    def json(self):
+        with self.open() as f:
+            return json.load(f)
 
-    except requests.exceptions.RequestException as e:
-        st.error(f"⚠️ Error fetching match data: {str(e)}")
-        return pd.DataFrame()
 
-def fetch_standings_from_api(league_id, season):
-    """Fetch current standings from the API"""
+class FixtureRecord(NamedTuple):
+    """The fields of an API fixture that the sync stores"""
+    fixture_id: int
+    date: str
+    home_team_id: int
+    home_team: str
+    away_team_id: int
+    away_team: str
+    home_score: Optional[int]
+    away_score: Optional[int]
+    status: str
+    league_name: str
+
+
+class FootballApiClient:
+    """
+    Client for the football API that reuses pooled keep-alive connections,
+    retries rate-limited and failed requests with backoff and applies
+    per-endpoint timeouts.
+    """
+
+    def __init__(self,
+                 api_key=None,
+                 base_url=FOOTBALL_API_BASE,
+                 pool_size=10,
+                 retries=3,
+                 backoff_factor=0.5,
+                 timeouts=None,
+                 cache=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeouts = {**ENDPOINT_TIMEOUTS, **(timeouts or {})}
+        self.cache = cache or ResponseCache(CACHE_DIR, CACHE_MAX_BYTES)
+
+        retry = Retry(total=retries,
+                      backoff_factor=backoff_factor,
+                      status_forcelist=RETRY_STATUSES,
+                      allowed_methods=frozenset(["GET"]),
+                      respect_retry_after_header=True,
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size,
+                              max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "X-RapidAPI-Key": api_key or os.getenv("RAPIDAPI_KEY"),
+            "X-RapidAPI-Host": FOOTBALL_API_HOST
+        })
+
+    def get(self, endpoint, params=None, **kwargs):
+        """
+        GET an endpoint such as "fixtures" with its timeout and return the
+        response. Extra arguments are passed on to requests.
+        """
+        return self.session.get(f"{self.base_url}/{endpoint}",
+                                params=params,
+                                timeout=self.timeouts.get(endpoint, DEFAULT_TIMEOUT),
+                                **kwargs)
+
+    def get_payload(self, endpoint, params=None):
+        """
+        GET an endpoint through the response cache.
+
+        Sends the cached ETag/Last-Modified so an unchanged response comes
+        back as 304 without a body, otherwise streams the new body to disk.
+        Raises requests.HTTPError for error responses.
+        """
+        key = self.cache.make_key(endpoint, params)
+        entry = self.cache.get(key)
+
+        headers = {}
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        with self.get(endpoint, params, headers=headers,
+                      stream=True) as response:
+            if response.status_code == 304 and entry:
+                self.cache.touch(key)
+                return ApiPayload(self.cache, key, params,
+                                  entry["content_hash"])
+
+            response.raise_for_status()
+            content_hash = self.cache.store(
+                key,
+                response.iter_content(chunk_size=CHUNK_SIZE),
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"))
+            return ApiPayload(self.cache, key, params, content_hash)
+
+    def close(self):
+        self.session.close()
+
+
+_api_client = None
+_api_client_lock = threading.Lock()
+
+
+def get_api_client():
+    """
+    Return the process-wide API client. FOOTBALL_API_BASE_URL and
+    FOOTBALL_API_POOL_SIZE override the defaults, e.g. to point at a stub.
+    """
+    global _api_client
+    with _api_client_lock:
+        if _api_client is None:
+            _api_client = FootballApiClient(
+                base_url=os.getenv("FOOTBALL_API_BASE_URL", FOOTBALL_API_BASE),
+                pool_size=int(os.getenv("FOOTBALL_API_POOL_SIZE", "10")))
+        return _api_client
+
+def fetch_fixtures_from_api(league_id,
+                            season,
+                            from_date=None,
+                            to_date=None):
+    """
+    Fetch the fixtures payload for a league and season from the API.
+    Pass from_date and to_date to only fetch fixtures in that date window.
+
+    Returns the payload to read with iter_fixtures, or None if the request
+    failed.
+    """
     try:
-        headers = {
-            "X-RapidAPI-Key": os.getenv("RAPIDAPI_KEY"),
-            "X-RapidAPI-Host": "api-football-v1.p.rapidapi.com"
+        print(f"Fetching matches from API for league {league_id}, season {season}")
+
+        # Get all fixtures for the league and season, or just the window
+        params = {
+            "league": league_id,
+            "season": season
         }
+        if from_date and to_date:
+            params["from"] = from_date.isoformat()
+            params["to"] = to_date.isoformat()
+
+        return get_api_client().get_payload("fixtures", params)
 
-        response = requests.get(
-            f"{FOOTBALL_API_BASE}/standings",
-            headers=headers,
-            params={
-                "league": league_id,
-                "season": season
-            },
-            timeout=10
-        )
-
-        if response.status_code == 401:
+    except requests.exceptions.HTTPError as e:
+        if e.response.status_code == 401:
             st.error("⚠️ Invalid API key. Please check your RapidAPI key.")
-            return pd.DataFrame()
+        else:
+            st.error(f"⚠️ Error fetching match data: {str(e)}")
+        return None
+    except requests.exceptions.RequestException as e:
+        st.error(f"⚠️ Error fetching match data: {str(e)}")
+        return None
+
 
-        response.raise_for_status()
-        data = response.json()
+def iter_fixtures(payload, header=None):
+    """
+    Parse the fixtures in a payload one at a time into FixtureRecords,
+    streaming the body from disk instead of loading it whole. Other
+    top-level fields such as "results" are put in header if given.
+    """
+    count = 0
+    with payload.open() as f:
+        try:
+            for fixture in iter_json_array(f, "response", header=header):
+                try:
+                    record = FixtureRecord(
+                        fixture_id=fixture['fixture']['id'],
+                        date=fixture['fixture']['date'][:10],
+                        home_team_id=fixture['teams']['home']['id'],
+                        home_team=fixture['teams']['home']['name'],
+                        away_team_id=fixture['teams']['away']['id'],
+                        away_team=fixture['teams']['away']['name'],
+                        home_score=fixture['goals']['home'],
+                        away_score=fixture['goals']['away'],
+                        status=fixture['fixture']['status']['short'],
+                        league_name=fixture['league']['name'])
+                except (KeyError, TypeError) as e:
+                    print(f"Error processing match: {str(e)}")
+                    continue
+                count += 1
+                yield record
+        except KeyError:
+            st.error("⚠️ Unexpected API response format")
+            return
+
+    print(f"Received {count} matches from API")
+    # An empty date window is normal, e.g. during an international break
+    if not count and "from" not in payload.params:
+        st.warning("No matches found for the selected league and season.")
+
+def fetch_standings_from_api(league_id, season):
+    """Fetch current standings from the API"""
+    try:
+        data = get_api_client().get_payload("standings", {
+            "league": league_id,
+            "season": season
+        }).json()
 
         if "response" not in data or not data["response"]:
             st.error("⚠️ No standings data available")
@@ -121,6 +269,12 @@ def fetch_standings_from_api(league_id, season):
 
         return pd.DataFrame(standings_data)
 
+    except requests.exceptions.HTTPError as e:
+        if e.response.status_code == 401:
+            st.error("⚠️ Invalid API key. Please check your RapidAPI key.")
+        else:
+            st.error(f"⚠️ Error fetching standings data: {str(e)}")
+        return pd.DataFrame()
     except requests.exceptions.RequestException as e:
         st.error(f"⚠️ Error fetching standings data: {str(e)}")
         return pd.DataFrame()
\ No newline at end of file
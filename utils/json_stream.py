@@ -0,0 +1,97 @@
+import json
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+# Characters that can follow a complete value inside a JSON document
+_DELIMITERS = ",:]}" + _WHITESPACE
+
+
+class _BufferedReader:
+    """Chunked reader over a text file that decodes one JSON value at a time"""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Read another chunk, returning False at the end of the file"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character, or '' at the end"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def decode(self):
+        """Decode the next complete JSON value, reading more data as needed"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+                # A number cut off by the end of the chunk, e.g. "1" of "1.5e3",
+                # decodes fine, so only trust a value followed by a delimiter
+                if self.eof or (end < len(self.buffer)
+                                and self.buffer[end] in _DELIMITERS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+
+def iter_json_array(f, key, header=None, chunk_size=64 * 1024):
+    """
+    Yield the items of the array stored under key in a top-level JSON
+    object, one at a time, without loading the whole document.
+
+    Other top-level values that appear before the array are decoded into
+    header if a dict is passed. Raises KeyError if the key is missing.
+    """
+    reader = _BufferedReader(f, chunk_size)
+    reader.expect("{")
+    if reader.peek() == "}":
+        raise KeyError(key)
+
+    while True:
+        name = reader.decode()
+        reader.expect(":")
+
+        if name == key:
+            reader.expect("[")
+            if reader.peek() == "]":
+                return
+            while True:
+                yield reader.decode()
+                if reader.peek() == "]":
+                    return
+                reader.expect(",")
+
+        value = reader.decode()
+        if header is not None:
+            header[name] = value
+
+        if reader.peek() == "}":
+            raise KeyError(key)
+        reader.expect(",")
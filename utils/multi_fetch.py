@@ -0,0 +1,93 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from utils.football_api import fetch_fixtures_from_api, fetch_standings_from_api
+
+# RapidAPI quota for the football API, override to match the plan in use
+REQUESTS_PER_MINUTE = int(os.getenv("FOOTBALL_API_REQUESTS_PER_MINUTE", "300"))
+MAX_CONCURRENCY = int(os.getenv("FOOTBALL_API_MAX_CONCURRENCY", "4"))
+
+
+class TokenBucket:
+    """
+    Client-side rate limiter for asyncio tasks. Allows bursts of up to
+    capacity requests and refills at rate requests per second.
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity,
+                                  self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+async def fetch_many_async(pairs,
+                           windows=None,
+                           max_concurrency: int = MAX_CONCURRENCY,
+                           requests_per_minute: int = REQUESTS_PER_MINUTE):
+    """
+    Fetch fixtures and standings for many (league_id, season) pairs at once.
+
+    windows optionally maps a pair to the (from, to) date window to fetch
+    fixtures for. At most max_concurrency requests are in flight and they
+    are started no faster than requests_per_minute.
+
+    Returns {(league_id, season): {'fixtures': payload, 'standings': df}}
+    ready to pass to sync_matches. A fixtures payload is None when the
+    request failed.
+    """
+    windows = windows or {}
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    bucket = TokenBucket(requests_per_minute / 60, capacity=max_concurrency)
+    # The pooled requests client is blocking, so requests run on threads
+    executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    async def run(fetch, *args, **kwargs):
+        async with semaphore:
+            await bucket.acquire()
+            return await loop.run_in_executor(executor,
+                                              partial(fetch, *args, **kwargs))
+
+    async def fetch_pair(league_id, season):
+        from_date, to_date = windows.get((league_id, season)) or (None, None)
+        fixtures, standings = await asyncio.gather(
+            run(fetch_fixtures_from_api,
+                league_id,
+                season,
+                from_date=from_date,
+                to_date=to_date),
+            run(fetch_standings_from_api, league_id, season))
+        return {'fixtures': fixtures, 'standings': standings}
+
+    try:
+        results = await asyncio.gather(*(fetch_pair(league_id, season)
+                                         for league_id, season in pairs))
+    finally:
+        executor.shutdown(wait=False)
+    return dict(zip(pairs, results))
+
+
+def fetch_many(pairs, windows=None, **kwargs):
+    """Blocking wrapper around fetch_many_async"""
+    pairs = list(pairs)
+    if not pairs:
+        return {}
+    return asyncio.run(fetch_many_async(pairs, windows, **kwargs))
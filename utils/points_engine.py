@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+# Outcome codes are np.sign(goals_for - goals_against) + 1
+RESULT_NAMES = np.array(['loss', 'draw', 'win'])
+RESULT_POINTS = np.array([0, 1, 3])
+
+RESULT_COLUMNS = [
+    'team', 'opponent', 'date', 'match_index', 'side', 'home_score',
+    'away_score', 'goals_for', 'goals_against', 'result', 'points',
+    'gameweek', 'cumulative_points', 'cumulative_goals_for',
+    'cumulative_goals_against'
+]
+
+
+def team_match_results(matches_df):
+    """
+    Score a flat frame of finished matches from every team's point of view.
+
+    Expects home_team, away_team, home_score, away_score and date columns,
+    where the team columns can hold ids or names. Returns one row per team
+    per match, ordered by team and date, with points, goals and running
+    totals computed in a single vectorized pass.
+    """
+    if matches_df.empty:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    home_team = matches_df['home_team'].to_numpy()
+    away_team = matches_df['away_team'].to_numpy()
+    home_score = matches_df['home_score'].to_numpy(dtype=np.int64)
+    away_score = matches_df['away_score'].to_numpy(dtype=np.int64)
+    dates = matches_df['date'].to_numpy()
+    match_index = np.arange(len(matches_df))
+
+    goals_for = np.concatenate([home_score, away_score])
+    goals_against = np.concatenate([away_score, home_score])
+    outcome = np.sign(goals_for - goals_against) + 1
+
+    results = pd.DataFrame({
+        'team': np.concatenate([home_team, away_team]),
+        'opponent': np.concatenate([away_team, home_team]),
+        'date': np.concatenate([dates, dates]),
+        'match_index': np.concatenate([match_index, match_index]),
+        'side': np.repeat(['home', 'away'], len(matches_df)),
+        'home_score': np.concatenate([home_score, home_score]),
+        'away_score': np.concatenate([away_score, away_score]),
+        'goals_for': goals_for,
+        'goals_against': goals_against,
+        'result': RESULT_NAMES[outcome],
+        'points': RESULT_POINTS[outcome],
+    })
+
+    results = results.sort_values(['team', 'date', 'match_index'],
+                                  kind='stable',
+                                  ignore_index=True)
+
+    grouped = results.groupby('team', sort=False)
+    results['gameweek'] = grouped.cumcount() + 1
+    results['cumulative_points'] = grouped['points'].cumsum()
+    results['cumulative_goals_for'] = grouped['goals_for'].cumsum()
+    results['cumulative_goals_against'] = grouped['goals_against'].cumsum()
+
+    return results
@@ -0,0 +1,54 @@
+import time
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+
+def in_streamlit():
+    """Check if the code is running inside a Streamlit script run"""
+    return get_script_run_ctx(suppress_warning=True) is not None
+
+
+class ProgressReporter:
+    """
+    Throttled progress reporting for long running work.
+
+    An update is only sent when at least min_interval seconds have passed or
+    progress moved by min_step since the last one, and always on completion.
+    Inside Streamlit updates drive a progress bar; elsewhere they are printed,
+    or dropped if log is False, so the same code runs from CLI workers.
+    """
+
+    def __init__(self, text, min_interval=0.5, min_step=0.1, log=True):
+        self.text = text
+        self.min_interval = min_interval
+        self.min_step = min_step
+        self.log = log
+        self.bar = st.progress(0, text=text) if in_streamlit() else None
+        self.last_fraction = 0.0
+        self.last_update = time.monotonic()
+
+    def update(self, done, total):
+        """Report that done out of total items are finished"""
+        fraction = min(done / total, 1.0) if total else 1.0
+        now = time.monotonic()
+        if (fraction < 1.0
+                and fraction - self.last_fraction < self.min_step
+                and now - self.last_update < self.min_interval):
+            return
+        if fraction == self.last_fraction and done:
+            return
+
+        self.last_fraction = fraction
+        self.last_update = now
+        text = f"{self.text} ({done}/{total})"
+        if self.bar is not None:
+            self.bar.progress(fraction, text=text)
+        elif self.log:
+            print(text)
+
+    def close(self):
+        """Remove the progress bar"""
+        if self.bar is not None:
+            self.bar.empty()
+            self.bar = None
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+
+class ResponseCache:
+    """
+    On-disk cache of API response bodies keyed by endpoint and params.
+
+    Each entry keeps the validators needed for conditional requests (ETag
+    and Last-Modified) and a SHA-256 of the body in a metadata file next to
+    the body. The least recently used bodies are evicted once the cache
+    grows past max_bytes.
+
+    There is no shared index: sizes and access times are read from the
+    directory, so the app, worker.py and backfill.py can share a cache
+    without overwriting each other's entries.
+    """
+
+    BODY_SUFFIX = ".json"
+    META_SUFFIX = ".meta"
+
+    def __init__(self, directory, max_bytes=200 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(endpoint, params=None):
+        """Build a stable cache key from an endpoint and its params"""
+        raw = json.dumps([endpoint, params or {}], sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def body_path(self, key):
+        return os.path.join(self.directory, f"{key}{self.BODY_SUFFIX}")
+
+    def meta_path(self, key):
+        return os.path.join(self.directory, f"{key}{self.META_SUFFIX}")
+
+    def get(self, key):
+        """Return the entry for key, or None if it is not cached"""
+        try:
+            with open(self.meta_path(key)) as f:
+                entry = json.load(f)
+            entry["last_access"] = os.path.getmtime(self.meta_path(key))
+        except (FileNotFoundError, ValueError):
+            return None
+        if not os.path.exists(self.body_path(key)):
+            return None
+        return entry
+
+    def touch(self, key):
+        """Mark an entry as recently used"""
+        try:
+            os.utime(self.meta_path(key))
+        except FileNotFoundError:
+            pass
+
+    def store(self, key, chunks, etag=None, last_modified=None):
+        """
+        Write a response body from an iterable of byte chunks and return its
+        content hash. The body is streamed to disk so it is never held in
+        memory as a whole.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+            os.replace(tmp_path, self.body_path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        # Written after the body, so the validators never describe a body
+        # that is not on disk yet
+        content_hash = digest.hexdigest()
+        self._write_meta(key, {
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_hash": content_hash,
+            "size": size,
+        })
+        with self._lock:
+            self._evict(keep=key)
+        return content_hash
+
+    def _write_meta(self, key, entry):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self.meta_path(key))
+
+    def _entries(self):
+        """Return (last access, size, key) for every body in the directory"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.BODY_SUFFIX):
+                continue
+            key = name[:-len(self.BODY_SUFFIX)]
+            try:
+                size = os.path.getsize(self.body_path(key))
+            except FileNotFoundError:
+                continue
+            try:
+                last_access = os.path.getmtime(self.meta_path(key))
+            except FileNotFoundError:
+                # A body without metadata can never be served, evict it first
+                last_access = 0
+            entries.append((last_access, size, key))
+        return entries
+
+    def _evict(self, keep=None):
+        """Drop least recently used bodies until the cache fits max_bytes"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= size
+            for path in (self.meta_path(key), self.body_path(key)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+# Per-match fields stored by SeasonData, one NumPy array each
+MATCH_FIELDS = ('dates', 'gameweeks', 'opponent_ids', 'is_home',
+                'home_scores', 'away_scores', 'points', 'cumulative_totals')
+
+
+class TeamMatches:
+    """One team's matches in a SeasonData, as views into its arrays"""
+
+    __slots__ = MATCH_FIELDS
+
+    def __init__(self, season, start, stop):
+        for field in MATCH_FIELDS:
+            setattr(self, field, getattr(season, field)[start:stop])
+
+    def __len__(self):
+        return len(self.gameweeks)
+
+
+class SeasonData:
+    """
+    Every team's finished matches in a league season, held as one NumPy
+    array per field ordered by team and gameweek.
+
+    Team i owns rows offsets[i]:offsets[i + 1], so per-team access is a
+    slice view and nothing is copied. cumulative_totals already include
+    each team's points deduction.
+    """
+
+    __slots__ = ('team_ids', 'offsets') + MATCH_FIELDS
+
+    @classmethod
+    def from_results(cls, results, team_ids, points_deductions):
+        """
+        Build the container from the output of team_match_results, keyed by
+        team id. Teams are stored in the order of team_ids; results for
+        teams not in team_ids are dropped.
+        """
+        season = cls()
+        season.team_ids = np.asarray(team_ids, dtype=np.int32)
+        deductions = np.asarray(points_deductions, dtype=np.int16)
+
+        team_index = results['team'].map(
+            pd.Series(np.arange(len(season.team_ids)), index=season.team_ids))
+        known = team_index.notna().to_numpy()
+        results = results[known]
+        team_index = team_index[known].to_numpy(dtype=np.int64)
+
+        # Results are in gameweek order within a team, keep that order
+        order = np.argsort(team_index, kind='stable')
+        team_index = team_index[order]
+
+        def column(name, dtype):
+            return results[name].to_numpy()[order].astype(dtype)
+
+        season.dates = pd.to_datetime(
+            results['date']).to_numpy()[order].astype('datetime64[D]')
+        season.gameweeks = column('gameweek', np.int16)
+        season.opponent_ids = column('opponent', np.int32)
+        season.is_home = results['side'].to_numpy()[order] == 'home'
+        season.home_scores = column('home_score', np.int8)
+        season.away_scores = column('away_score', np.int8)
+        season.points = column('points', np.int8)
+        season.cumulative_totals = (column('cumulative_points', np.int16) -
+                                    deductions[team_index])
+
+        season.offsets = np.zeros(len(season.team_ids) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(team_index, minlength=len(season.team_ids)),
+                  out=season.offsets[1:])
+        return season
+
+    def __len__(self):
+        return len(self.team_ids)
+
+    def team_matches(self, index):
+        """Return the matches of the team at index as array views"""
+        return TeamMatches(self, self.offsets[index], self.offsets[index + 1])
+
+    @property
+    def nbytes(self):
+        """Total size of the arrays in bytes"""
+        return sum(getattr(self, field).nbytes
+                   for field in self.__slots__)
@@ -0,0 +1,92 @@
+import argparse
+import time
+
+from db.database import get_db, init_db
+from db.head_to_head import missing_pairs, refresh_head_to_head
+from utils.api import AVAILABLE_LEAGUES, AVAILABLE_SEASONS
+from utils.data_sync import get_incremental_window, needs_refresh, sync_matches_locked
+from utils.dev_mode import log_error
+from utils.multi_fetch import fetch_many
+
+
+def sync_all(leagues, seasons):
+    """Refresh every league and season that needs it"""
+    pending = [(league_id, season) for league_id in leagues
+               for season in seasons if needs_refresh(league_id, season)]
+    if not pending:
+        return
+
+    db = next(get_db())
+    try:
+        windows = {(league_id, season): get_incremental_window(db, league_id, season)
+                   for league_id, season in pending}
+    finally:
+        db.close()
+
+    # Fetch every pending league and season concurrently, then write them
+    payloads = fetch_many(pending, windows)
+    for league_id, season in pending:
+        payload = payloads[(league_id, season)]
+        if payload['fixtures'] is None:
+            # The request failed, try again on the next pass
+            continue
+        try:
+            sync_matches_locked(league_id,
+                                season,
+                                wait=False,
+                                fixtures_payload=payload['fixtures'],
+                                standings_df=payload['standings'])
+        except Exception as e:
+            log_error(f"Sync failed for league {league_id}, season {season}", e)
+
+
+def build_missing_head_to_head():
+    """
+    Build the head-to-head summaries of pairs stored before the sync kept
+    them, since the read-only app does not build them on demand
+    """
+    db = next(get_db())
+    try:
+        pairs = missing_pairs(db)
+        if pairs:
+            print(f"Building head-to-head summaries for {len(pairs)} team pairs")
+            refresh_head_to_head(db, pairs)
+            db.commit()
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Keep match data fresh outside the Streamlit app")
+    parser.add_argument("--league", type=int, action="append",
+                        help="League API id to sync (default: all available leagues)")
+    parser.add_argument("--season", type=int, action="append",
+                        help="Season to sync (default: all available seasons)")
+    parser.add_argument("--interval", type=int, default=900,
+                        help="Seconds between sync runs (default: 900)")
+    parser.add_argument("--once", action="store_true",
+                        help="Run a single sync pass and exit")
+    args = parser.parse_args()
+
+    leagues = args.league or [int(league_id) for league_id in AVAILABLE_LEAGUES]
+    seasons = args.season or [int(season) for season in AVAILABLE_SEASONS]
+
+    if not init_db():
+        raise SystemExit(log_error("Database initialization failed"))
+
+    build_missing_head_to_head()
+
+    while True:
+        started = time.monotonic()
+        print(f"Sync pass for leagues {leagues}, seasons {seasons}")
+        sync_all(leagues, seasons)
+        print(f"Sync pass finished in {time.monotonic() - started:.1f}s")
+
+        if args.once:
+            break
+        time.sleep(max(0, args.interval - (time.monotonic() - started)))
+
+
+if __name__ == "__main__":
+    main()